@@ -0,0 +1,269 @@
+"""
+Micro-benchmarks for the markdown-to-DOCX pipeline in generate_user_manual.py
+Run: python bench_user_manual.py [benchmark ...] [--size N]
+"""
+import argparse
+import base64
+import contextlib
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import time
+import tracemalloc
+from itertools import islice
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+import generate_user_manual
+from docx_assembly import DocumentAssembler
+from docx_tables import add_bulk_table
+from generate_user_manual import (
+    LineReader, iter_blocks, parse_inline_formatting, render_block, picture_path, new_document,
+    IMAGE_WIDTH,
+    Heading, Picture, Table, Alert, Quote, ListItem, Rule, Paragraph,
+)
+
+# Line mix roughly matching docs/USER_WORKFLOW_GUIDE.md
+SAMPLE_LINES = [
+    '## Manage Projects',
+    '',
+    'Create and manage all projects in the system.',
+    '',
+    '![Projects Page](./screenshots/projects_page.png)',
+    '',
+    '**To Create a Project:**',
+    '1. Navigate to **Manage Projects**',
+    '2. Click **"+ Add Project"**',
+    '   - Name, Client, Deadline',
+    '- **Edit** - Update project information',
+    '* **Delete** - Remove project',
+    '',
+    '| Field | Description |',
+    '|-------|-------------|',
+    '| **Name** | Project name |',
+    '| **Client** | Linked client |',
+    '',
+    '> [!NOTE]',
+    '> Progress is derived from linked task completions.',
+    '',
+    '> Plain quoted text',
+    '---',
+]
+
+def synthetic_guide(line_count):
+    repeats = line_count // len(SAMPLE_LINES) + 1
+    text = '\n'.join(SAMPLE_LINES * repeats) + '\n'
+    return '\n'.join(text.split('\n')[:line_count]) + '\n'
+
+def legacy_blocks(f):
+    """The if-chain classifier create_manual used before the lexer, kept for comparison"""
+    reader = LineReader(f)
+    for line in reader:
+        stripped = line.strip()
+        if line.startswith('#'):
+            level = len(line.split()[0])
+            text = line.lstrip('#').strip()
+            yield Heading(level, re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text))
+            continue
+        img_match = re.match(r'!\[(.*?)\]\((.*?)\)', line)
+        if img_match:
+            yield Picture(img_match.group(1), img_match.group(2))
+            continue
+        if stripped.startswith('|'):
+            table_lines = [line]
+            while reader.peek() is not None and reader.peek().strip().startswith('|'):
+                table_lines.append(next(reader))
+            yield Table(table_lines)
+            continue
+        if stripped.startswith('>'):
+            content = stripped.lstrip('>').strip()
+            if content.startswith('[!') and ']' in content:
+                alert_type_match = re.match(r'\[!(.*?)\]', content)
+                if alert_type_match:
+                    content = ""
+                    while reader.peek() is not None and reader.peek().strip().startswith('>'):
+                        content += next(reader).strip().lstrip('>').strip() + " "
+                    yield Alert(alert_type_match.group(1), content)
+                    continue
+            yield Quote(content)
+            continue
+        if stripped.startswith('- ') or stripped.startswith('* '):
+            yield ListItem('List Bullet', parse_inline_formatting(stripped[2:]))
+            continue
+        if re.match(r'^\d+\.', stripped):
+            text = re.sub(r'^\d+\.\s+', '', stripped)
+            yield ListItem('List Number', parse_inline_formatting(text))
+            continue
+        if stripped == '---':
+            yield Rule()
+            continue
+        if stripped:
+            yield Paragraph(parse_inline_formatting(line))
+
+def time_parser(parser, source, line_count):
+    start = time.perf_counter()
+    blocks = sum(1 for _ in parser(io.StringIO(source)))
+    elapsed = time.perf_counter() - start
+    return blocks, elapsed, line_count / elapsed
+
+def bench_lexer(line_count=1_000_000):
+    source = synthetic_guide(line_count)
+    print(f"Lexing a {line_count:,}-line synthetic guide")
+    results = {}
+    for name, parser in [('legacy if-chain', legacy_blocks), ('lexer', iter_blocks)]:
+        blocks, elapsed, rate = time_parser(parser, source, line_count)
+        results[name] = rate
+        print(f"  {name:<16} {blocks:>9,} blocks  {elapsed:6.2f}s  {rate:>12,.0f} lines/sec")
+    print(f"  speedup: {results['lexer'] / results['legacy if-chain']:.2f}x")
+
+def bench_ast_cache(line_count=1_000_000):
+    print(f"Loading the blocks of a {line_count:,}-line synthetic guide")
+    with tempfile.TemporaryDirectory() as tmp:
+        markdown_file = os.path.join(tmp, 'guide.md')
+        with open(markdown_file, 'w', encoding='utf-8') as f:
+            f.write(synthetic_guide(line_count))
+        generate_user_manual.CACHE_DIR = tmp
+
+        for label in ('lex + write cache', 'cached AST read'):
+            start = time.perf_counter()
+            blocks = sum(1 for _ in generate_user_manual.load_blocks(markdown_file))
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<18} {blocks:>9,} blocks  {elapsed:6.2f}s  {line_count / elapsed:>12,.0f} lines/sec")
+
+def legacy_table(doc, rows):
+    """Cell-by-cell fill through python-docx proxies, as the generators did before add_bulk_table"""
+    table = doc.add_table(rows=len(rows), cols=len(rows[0]))
+    for r, cells in enumerate(rows):
+        row_cells = table.rows[r].cells
+        for c, text in enumerate(cells):
+            row_cells[c].text = text
+
+def bench_tables(max_rows=50_000):
+    print(f"Building 4-column tables of up to {max_rows:,} rows")
+    sizes = sorted({max(1, max_rows * n // 50) for n in (1, 5, 10, 25, 50)})
+    per_row = []
+    for size in sizes:
+        rows = [('ID-%06d' % i, 'Test case text', 'Expected result text', 'High') for i in range(size)]
+        # Only the table build is timed, not creating the document from its template
+        document = Document()
+        start = time.perf_counter()
+        add_bulk_table(document, rows)
+        elapsed = time.perf_counter() - start
+        per_row.append(elapsed / size)
+        line = f"  {size:>8,} rows  bulk {elapsed:7.3f}s  ({per_row[-1] * 1e6:5.1f} us/row)"
+
+        # The old approach is quadratic, so only time it on the smaller tables
+        if size <= 2_000:
+            document = Document()
+            start = time.perf_counter()
+            legacy_table(document, rows)
+            line += f"   cell-by-cell {time.perf_counter() - start:7.3f}s"
+        print(line)
+    print(f"  per-row cost, largest vs smallest table: {per_row[-1] / per_row[0]:.2f}x (1.0x = linear)")
+
+def bench_data_tables(row_count=50_000):
+    print(f"Streaming {row_count:,}-row data files into DOCX tables")
+    with tempfile.TemporaryDirectory() as tmp:
+        records = ({'Route': f"/route/{i}", 'Roles': 'admin,manager', 'Auth': i % 2 == 0, 'Limit': i * 10}
+                   for i in range(row_count))
+        csv_path, json_path = os.path.join(tmp, 'routes.csv'), os.path.join(tmp, 'routes.json')
+        with open(csv_path, 'w', encoding='utf-8', newline='') as csv_file, \
+                open(json_path, 'w', encoding='utf-8') as json_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['Route', 'Roles', 'Auth', 'Limit'])
+            json_file.write('[\n')
+            for i, record in enumerate(records):
+                writer.writerow(record.values())
+                json_file.write((',\n' if i else '') + json.dumps(record))
+            json_file.write('\n]\n')
+
+        for path in (csv_path, json_path):
+            start = time.perf_counter()
+            generate_user_manual.add_data_table(DocumentAssembler(new_document()), path)
+            elapsed = time.perf_counter() - start
+
+            # Traced separately since tracemalloc slows allocation down; the table XML itself
+            # lives in lxml, so this is the memory of the reader pipeline
+            tracemalloc.start()
+            generate_user_manual.add_data_table(DocumentAssembler(new_document()), path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  {os.path.basename(path):<12} {elapsed:7.3f}s  ({elapsed / row_count * 1e6:5.1f} us/row)  "
+                  f"peak Python memory {peak / 1024:8.1f} KiB")
+
+# 1x1 PNG standing in for the screenshots referenced by SAMPLE_LINES
+SAMPLE_PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg==')
+
+def legacy_render(doc, block, base_dir):
+    """render_block against a bare python-docx Document, as DocxRenderer did before DocumentAssembler"""
+    if isinstance(block, Picture):
+        image_data = generate_user_manual.IMAGE_CACHE.get(picture_path(block, base_dir), IMAGE_WIDTH)
+        doc.add_picture(io.BytesIO(image_data), width=IMAGE_WIDTH)
+        doc.paragraphs[-1].alignment = WD_ALIGN_PARAGRAPH.CENTER
+        doc.add_paragraph(block.alt, style='Caption').alignment = WD_ALIGN_PARAGRAPH.CENTER
+    else:
+        render_block(doc, block, base_dir)
+
+def bench_assembly(max_blocks=100_000):
+    print(f"Assembling documents of up to {max_blocks:,} blocks")
+    sizes = [n for n in (100, 1_000, 10_000, 100_000, 1_000_000) if n <= max_blocks] or [max_blocks]
+    source = synthetic_guide(max_blocks * 2)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'screenshots'))
+        with open(os.path.join(tmp, 'screenshots', 'projects_page.png'), 'wb') as f:
+            f.write(SAMPLE_PNG)
+        generate_user_manual.IMAGE_CACHE = generate_user_manual.ImageCache(tmp)
+
+        per_block = []
+        for size in sizes:
+            blocks = list(islice(iter_blocks(io.StringIO(source)), size))
+            # add_image reports every picture it embeds
+            # Only rendering is timed, not loading the template into a new document
+            document = new_document()
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                assembler = DocumentAssembler(document)
+                for block in blocks:
+                    render_block(assembler, block, tmp)
+                elapsed = time.perf_counter() - start
+            per_block.append(elapsed / size)
+            line = f"  {size:>9,} blocks  assembler {elapsed:7.3f}s  ({per_block[-1] * 1e6:6.1f} us/block)"
+
+            # Plain python-docx slows down as the body grows, so only time it on the smaller documents
+            if size <= 2_000:
+                doc = new_document()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    for block in blocks:
+                        legacy_render(doc, block, tmp)
+                    elapsed = time.perf_counter() - start
+                line += f"   python-docx {elapsed:7.3f}s  ({elapsed / size * 1e6:6.1f} us/block)"
+            print(line)
+    print(f"  per-block cost, largest vs smallest document: {per_block[-1] / per_block[0]:.2f}x (1.0x = linear)")
+
+BENCHMARKS = {
+    'lexer': bench_lexer,
+    'tables': bench_tables,
+    'data': bench_data_tables,
+    'assembly': bench_assembly,
+    'ast': bench_ast_cache,
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('benchmarks', nargs='*', help=f"any of: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--size', type=int, help='override the input size of each benchmark')
+    args = parser.parse_args()
+
+    for name in args.benchmarks or BENCHMARKS:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+        if args.size:
+            BENCHMARKS[name](args.size)
+        else:
+            BENCHMARKS[name]()
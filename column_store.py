@@ -0,0 +1,82 @@
+"""
+Dictionary-encoded columns with group-by counting, for the test plan summaries
+
+Each column keeps its distinct values once and one integer code per row in an array('I'),
+so a catalog costs four bytes per tracked cell however long its strings are. A pivot of two
+columns is then a single count over the combined codes: numpy.bincount when NumPy is
+installed, collections.Counter over the code pairs otherwise.
+"""
+from array import array
+from collections import Counter, namedtuple
+
+# NumPy is optional: without it pivots are counted with Counter
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# counts[i][j] is the number of rows with rows[i] in one column and columns[j] in the other
+Pivot = namedtuple('Pivot', ['rows', 'columns', 'counts'])
+
+class Column:
+    """One dictionary-encoded column; values are listed in order of first appearance"""
+
+    def __init__(self):
+        self.values = []
+        self.codes = array('I')
+        self._index = {}
+
+    def append(self, value):
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def extend(self, other):
+        """Append the rows of another Column, re-encoding its codes into this column's"""
+        for value in other.values:
+            if value not in self._index:
+                self._index[value] = len(self.values)
+                self.values.append(value)
+        recode = [self._index[value] for value in other.values]
+        self.codes.extend(map(recode.__getitem__, other.codes))
+
+    def __len__(self):
+        return len(self.codes)
+
+class ColumnStore:
+    """Named columns filled a row at a time, for group-by counts after a streaming pass"""
+
+    def __init__(self, names):
+        self.columns = {name: Column() for name in names}
+        self._appenders = [column.append for column in self.columns.values()]
+
+    def append(self, *values):
+        """Add a row, one value per column in the order the names were given"""
+        for append, value in zip(self._appenders, values):
+            append(value)
+
+    def extend(self, other):
+        """Append the rows of another ColumnStore with the same column names, e.g. from a worker"""
+        for name, column in self.columns.items():
+            column.extend(other.columns[name])
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    def pivot(self, row_name, column_name):
+        """Count the rows for every combination of values of two columns"""
+        rows, columns = self.columns[row_name], self.columns[column_name]
+        width = len(columns.values)
+        size = len(rows.values) * width
+        if numpy is not None:
+            keys = numpy.frombuffer(rows.codes, dtype=numpy.uintc).astype(numpy.intp) * width
+            keys += numpy.frombuffer(columns.codes, dtype=numpy.uintc)
+            flat = numpy.bincount(keys, minlength=size).tolist()
+        else:
+            flat = [0] * size
+            for (row, column), count in Counter(zip(rows.codes, columns.codes)).items():
+                flat[row * width + column] = count
+        return Pivot(list(rows.values), list(columns.values),
+                     [flat[start:start + width] for start in range(0, size, width or 1)])
@@ -1,481 +1,403 @@
 """
-Script to convert the test case plan markdown to Word document
+Generate the test case plan Word document from the test case catalog
+
+The test cases live in test_cases.csv, one row per case, ordered by section and subsection
+as they appear in the plan. create_test_plan reads the catalog as a stream and writes each
+subsection's table while its rows are being read, so the plan, including the summary counts,
+is built in a single pass whatever the size of the catalog. export_csv and export_xlsx
+stream the same per-case rows into spreadsheets for running the plan. Given run results
+(see run_results.py), all of them add the latest status and run time of every test case.
 """
+import argparse
+import csv
+import os
+import re
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import chain, groupby
+from operator import attrgetter, itemgetter
+
 from docx import Document
-from docx.shared import Inches, Pt, RGBColor
+from docx.shared import Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.table import WD_TABLE_ALIGNMENT
-from docx.oxml.ns import nsdecls
 from docx.oxml import parse_xml
-
-# Create document
-doc = Document()
-
-# Set document styles
-style = doc.styles['Normal']
-style.font.name = 'Calibri'
-style.font.size = Pt(11)
-
-# Title
-title = doc.add_heading('COSMOS PM Admin Panel - Test Case Plan', 0)
-title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-# Executive Summary
-doc.add_heading('Executive Summary', level=1)
-doc.add_paragraph('This document outlines a comprehensive test case plan for the COSMOS PM Admin Panel, a React-based project management application with Firebase backend. The plan covers all major modules across 5 user roles: SuperAdmin, Admin, Manager, Employee, and Client.')
-
-# Project Overview Table
-doc.add_heading('Project Overview', level=1)
-table = doc.add_table(rows=5, cols=2)
-table.style = 'Table Grid'
-data = [
+from lxml import etree
+
+from column_store import ColumnStore
+from docx_assembly import DocumentAssembler
+from docx_tables import add_bulk_table
+from run_results import load_results
+
+# openpyxl is optional: it is only needed for the XLSX export
+try:
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+except ImportError:
+    openpyxl = None
+
+# Configuration
+CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_cases.csv')
+OUTPUT_FILE = r'd:\COSMOS\COSMOS_Test_Case_Plan.docx'
+PRIORITIES = ('High', 'Medium', 'Low')  # Summary columns; other priorities only count towards the totals
+
+# Catalog columns, in the order of the TestCase fields; the file may order them any way
+CATALOG_COLUMNS = ('Module', 'Section', 'Subsection', 'Test ID', 'Test Case', 'Expected Result', 'Priority',
+                   'Role', 'Status', 'Last Run')
+CATALOG_DEFAULTS = {'Role': 'All', 'Status': 'Not Run', 'Last Run': ''}  # Optional columns and their default
+TestCase = namedtuple('TestCase', ['module', 'section', 'subsection', 'test_id', 'test_case', 'expected', 'priority',
+                                   'role', 'status', 'last_run'])
+CASE_FIELDS = dict(zip(CATALOG_COLUMNS, TestCase._fields))
+SUMMARY_COLUMNS = ('module', 'priority', 'role', 'status')  # TestCase fields kept for the appendix pivots
+TEST_COLUMNS = ('Test ID', 'Test Case', 'Expected Result', 'Priority')  # Per-case columns in tables and exports
+RESULT_COLUMNS = TEST_COLUMNS + ('Status', 'Last Run')  # The same once run results are merged in
+LAST_RUN_FORMAT = '%Y-%m-%d %H:%M'
+STALE_AFTER_DAYS = 30  # Results this much older than the newest run are reported as stale
+REPORT_ID_LIMIT = 25  # Test IDs listed per line of the results report
+SHEET_TITLE_INVALID = re.compile(r'[\\/*?:\[\]]')  # Characters Excel does not allow in sheet names
+SHEET_TITLE_LENGTH = 31
+SECTIONS_IN_FLIGHT = 2  # Sections queued per worker in parallel mode, bounding memory on huge catalogs
+
+PROJECT_OVERVIEW = [
     ('Tech Stack', 'React 19, Vite, TailwindCSS, Firebase (Auth, Firestore)'),
     ('User Roles', 'SuperAdmin, Admin, Manager, Employee (Member), Client'),
     ('Key Modules', 'Dashboard, Resource/Client/Project/Task Management, Lead Management, Calendar, Reports, Documents, Knowledge Base, MOM Generator, Expenses'),
     ('Current Test Status', 'No automated tests exist in the project'),
 ]
-for i, (aspect, details) in enumerate(data):
-    row = table.rows[i]
-    row.cells[0].text = aspect
-    row.cells[1].text = details
 
-doc.add_paragraph()
+def create_test_plan(catalog_file=None, output_file=None, parallel=False, workers=None, results=None):
+    """
+    Render the test case plan for a catalog to a DOCX file and return its path. With parallel,
+    sections are rendered in a pool of worker processes (default: CPU count) and merged in order.
+    With results (a run_results.ResultIndex), every table gains Status and Last Run columns from
+    the latest result for each Test ID, and stale and unknown IDs are reported.
+    """
+    catalog_file = catalog_file or CATALOG_FILE
+    output_file = output_file or OUTPUT_FILE
+    cases, columns, test_ids = plan_cases(catalog_file, results)
+
+    document = Document()
+
+    # Set document styles
+    style = document.styles['Normal']
+    style.font.name = 'Calibri'
+    style.font.size = Pt(11)
+
+    doc = DocumentAssembler(document)
+    add_front_matter(doc)
+    summary = ColumnStore(SUMMARY_COLUMNS)
+    if parallel:
+        add_test_sections_in_parallel(doc, cases, summary, columns, workers)
+    else:
+        add_test_sections(doc, cases, summary, columns)
+    add_summary(doc, summary)
+
+    # Footer
+    doc.add_paragraph()
+    doc.add_paragraph('Document Version: 1.0')
+    doc.add_paragraph('Created: January 19, 2026')
+    doc.add_paragraph('Project: COSMOS PM Admin Panel')
+
+    document.save(output_file)
+    print(f'Word document saved to: {output_file}')
+    if results is not None:
+        report_results(results, test_ids)
+    return output_file
+
+def read_catalog(catalog_file):
+    """Yield the test cases of a CSV catalog one at a time as TestCase tuples"""
+    with open(catalog_file, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        absent = [column for column in CATALOG_COLUMNS if column not in header]
+        missing = [column for column in absent if column not in CATALOG_DEFAULTS]
+        if missing:
+            raise ValueError(f"{catalog_file}: missing catalog column(s): {', '.join(missing)}")
+
+        # Optional columns the file lacks are read from default cells put after each row
+        width = len(header)
+        defaults = [CATALOG_DEFAULTS[column] for column in absent]
+        fields = itemgetter(*((header + absent).index(column) for column in CATALOG_COLUMNS))
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                row += [''] * (width - len(row))
+            row[width:] = defaults
+            yield TestCase._make(fields(row))
+
+def plan_cases(catalog_file, results=None):
+    """
+    Return the catalog's test cases, the per-case columns to show and the set that collects
+    every Test ID read. With results, each case takes the status and time of its latest result.
+    """
+    cases = read_catalog(catalog_file)
+    test_ids = set()
+    if results is None:
+        return cases, TEST_COLUMNS, test_ids
+    return merge_results(cases, results, test_ids), RESULT_COLUMNS, test_ids
+
+def merge_results(cases, results, test_ids):
+    # One dict lookup per case, however many result files went into the index
+    for case in cases:
+        test_ids.add(case.test_id)
+        result = results.get(case.test_id)
+        if result is not None:
+            case = case._replace(status=result.status, last_run=result.last_run.strftime(LAST_RUN_FORMAT))
+        yield case
+
+def report_results(results, test_ids):
+    """Print how the results matched the catalog: untested, stale and unknown Test IDs"""
+    stale_after = timedelta(days=STALE_AFTER_DAYS)
+    matched = test_ids & results.results.keys()
+    unknown = sorted(results.results.keys() - test_ids)
+    not_run = sorted(test_ids - matched)
+    stale = sorted(test_id for test_id in matched if results.newest - results.results[test_id].last_run > stale_after)
+
+    print(f'Results: {len(matched)}/{len(test_ids)} test cases matched from {results.files} file(s)')
+    if not_run:
+        print(f'  No result for {len(not_run)} test case(s): {id_list(not_run)}')
+    if stale:
+        print(f'  Stale (last run over {stale_after.days} days before the newest run) for {len(stale)}: {id_list(stale)}')
+    if unknown:
+        print(f'  Unknown Test IDs in results, not in the catalog ({len(unknown)}): {id_list(unknown)}')
+    if results.unidentified:
+        print(f'  {results.unidentified} result(s) without a recognisable Test ID')
+    if results.unreadable:
+        print(f'  Skipped {len(results.unreadable)} unreadable result file(s): {id_list(results.unreadable)}')
+
+def id_list(test_ids):
+    # Long lists are cut short so the report stays readable on large catalogs
+    shown = ', '.join(test_ids[:REPORT_ID_LIMIT])
+    return shown if len(test_ids) <= REPORT_ID_LIMIT else f'{shown} ... and {len(test_ids) - REPORT_ID_LIMIT} more'
+
+def add_front_matter(doc):
+    # Title
+    title = doc.add_heading('COSMOS PM Admin Panel - Test Case Plan', 0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    # Executive Summary
+    doc.add_heading('Executive Summary', level=1)
+    doc.add_paragraph('This document outlines a comprehensive test case plan for the COSMOS PM Admin Panel, a React-based project management application with Firebase backend. The plan covers all major modules across 5 user roles: SuperAdmin, Admin, Manager, Employee, and Client.')
+
+    # Project Overview Table
+    doc.add_heading('Project Overview', level=1)
+    table = doc.add_table(rows=5, cols=2, style='Table Grid')
+    for row, (aspect, details) in zip(table.rows, PROJECT_OVERVIEW):
+        row.cells[0].text = aspect
+        row.cells[1].text = details
+
+    doc.add_paragraph()
 
-# Test Categories
-def add_test_table(doc, title, tests):
+def add_test_sections(doc, cases, summary, columns=TEST_COLUMNS):
+    """
+    Write a numbered heading per section and a table per subsection, recording each case's
+    SUMMARY_COLUMNS in the summary ColumnStore as it streams past. Consecutive rows with the
+    same section (subsection) belong together, so the catalog must be ordered by them.
+    """
+    sections = groupby(cases, key=attrgetter('section'))
+    for section_number, (section, section_cases) in enumerate(sections, 1):
+        add_test_section(doc, section_number, section, section_cases, summary, columns)
+
+def add_test_section(doc, section_number, section, cases, summary, columns=TEST_COLUMNS):
+    doc.add_heading(f'{section_number}. {section}', level=1)
+    subsections = groupby(cases, key=attrgetter('subsection'))
+    for subsection_number, (subsection, subsection_cases) in enumerate(subsections, 1):
+        add_test_table(doc, f'{section_number}.{subsection_number} {subsection}',
+                       recorded(subsection_cases, summary, columns), columns)
+
+def add_test_sections_in_parallel(doc, cases, summary, columns=TEST_COLUMNS, workers=None):
+    """
+    Like add_test_sections, but each section is rendered by render_section in a worker process
+    and its body XML is spliced into doc in section order. Only SECTIONS_IN_FLIGHT sections per
+    worker are queued at a time, so neither the catalog nor the rendered fragments pile up.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        sections = groupby(cases, key=attrgetter('section'))
+        for section_number, (section, section_cases) in enumerate(sections, 1):
+            pending.append(pool.submit(render_section, section_number, section, list(section_cases), columns))
+            if len(pending) >= workers * SECTIONS_IN_FLIGHT:
+                merge_section(doc, pending.popleft().result(), summary)
+        while pending:
+            merge_section(doc, pending.popleft().result(), summary)
+
+_scratch_document = None
+
+def render_section(section_number, section, cases, columns=TEST_COLUMNS):
+    # Section worker: renders into a scratch document kept for the life of the process and returns
+    # the body XML and summary columns of the section. The scratch and main documents come from the
+    # same default template, so their style ids match.
+    global _scratch_document
+    if _scratch_document is None:
+        _scratch_document = DocumentAssembler(Document())
+    doc = _scratch_document
+    summary = ColumnStore(SUMMARY_COLUMNS)
+    add_test_section(doc, section_number, section, cases, summary, columns)
+
+    body = doc.element.body
+    elements = [element for element in body if element is not body.sectPr]
+    for element in elements:
+        body.remove(element)
+    return [etree.tostring(element, encoding='unicode') for element in elements], summary
+
+def merge_section(doc, fragment, summary):
+    elements, section_summary = fragment
+    for xml in elements:
+        doc.append(parse_xml(xml))
+    summary.extend(section_summary)
+
+def recorded(cases, summary, columns=TEST_COLUMNS):
+    record = summary.append
+    cells = row_cells(columns)
+    for case in cases:
+        record(case.module, case.priority, case.role, case.status)
+        yield cells(case)
+
+def row_cells(columns):
+    # A getter for the cells of a case under the given catalog column names
+    return attrgetter(*(CASE_FIELDS[column] for column in columns))
+
+def add_test_table(doc, title, tests, columns=TEST_COLUMNS):
     """Helper to add a test case table"""
     doc.add_heading(title, level=2)
-    if not tests:
-        return
-    
-    table = doc.add_table(rows=len(tests) + 1, cols=4)
-    table.style = 'Table Grid'
-    
-    # Header row
-    header = table.rows[0]
-    headers = ['Test ID', 'Test Case', 'Expected Result', 'Priority']
+    add_bulk_table(doc, chain([columns], tests))
+    doc.add_paragraph()
+
+def add_summary(doc, summary):
+    # Test Count Summary
+    doc.add_heading('Appendix: Test Count Summary', level=1)
+    add_count_table(doc, summary.pivot('module', 'priority'), PRIORITIES,
+                    ['Module', 'Test Cases', 'High Priority', 'Medium', 'Low'])
+
+    doc.add_heading('Test Count by Role', level=2)
+    add_count_table(doc, summary.pivot('role', 'priority'), PRIORITIES,
+                    ['Role', 'Test Cases', 'High Priority', 'Medium', 'Low'])
+
+    doc.add_heading('Test Status by Module', level=2)
+    status = summary.pivot('module', 'status')
+    add_count_table(doc, status, status.columns, ['Module', 'Test Cases', *status.columns])
+
+def add_count_table(doc, pivot, columns, headers):
+    """
+    Add a pivot as a table of row label, row total and the count under each of columns,
+    followed by a bold TOTAL row. Totals include values that are not among columns.
+    """
+    positions = [pivot.columns.index(column) if column in pivot.columns else None for column in columns]
+    column_totals = [sum(column_counts) for column_counts in zip(*pivot.counts)]
+    summary_data = [count_row(label, counts, positions) for label, counts in zip(pivot.rows, pivot.counts)]
+    summary_data.append(count_row('TOTAL', column_totals or [0] * len(pivot.columns), positions))
+
+    summary_table = doc.add_table(rows=len(summary_data) + 1, cols=len(headers), style='Table Grid')
+    rows = summary_table.rows
+
+    # Header
+    header = rows[0]
     for i, text in enumerate(headers):
-        cell = header.cells[i]
-        cell.text = text
-        # Bold header
-        for paragraph in cell.paragraphs:
+        header.cells[i].text = text
+        for paragraph in header.cells[i].paragraphs:
             for run in paragraph.runs:
                 run.bold = True
-    
-    # Data rows
-    for i, test in enumerate(tests):
-        row = table.rows[i + 1]
-        row.cells[0].text = test[0]
-        row.cells[1].text = test[1]
-        row.cells[2].text = test[2]
-        row.cells[3].text = test[3]
-    
-    doc.add_paragraph()
-
-# Authentication Tests
-doc.add_heading('1. Authentication & Authorization Tests', level=1)
-
-login_tests = [
-    ('AUTH-001', 'Valid login with correct credentials', 'User redirected to role-specific dashboard', 'High'),
-    ('AUTH-002', 'Invalid login with wrong password', 'Error message displayed, user stays on login', 'High'),
-    ('AUTH-003', 'Login with non-existent email', 'Appropriate error message shown', 'High'),
-    ('AUTH-004', 'Login with empty fields', 'Validation errors shown', 'Medium'),
-    ('AUTH-005', 'Session persistence after page refresh', 'User remains logged in', 'High'),
-    ('AUTH-006', 'Logout functionality', 'User redirected to login, session cleared', 'High'),
-]
-add_test_table(doc, '1.1 Login Functionality', login_tests)
-
-password_tests = [
-    ('AUTH-007', 'Forgot password with valid email', 'Password reset email sent', 'High'),
-    ('AUTH-008', 'Forgot password with invalid email', 'Error message displayed', 'Medium'),
-    ('AUTH-009', 'Reset password with valid token', 'Password updated successfully', 'High'),
-    ('AUTH-010', 'Force change password on first login', 'User prompted to change password', 'High'),
-    ('AUTH-011', 'Change password from profile settings', 'Password updated, user notified', 'Medium'),
-]
-add_test_table(doc, '1.2 Password Management', password_tests)
-
-rbac_tests = [
-    ('AUTH-012', 'SuperAdmin accessing all routes', 'Full access granted', 'High'),
-    ('AUTH-013', 'Admin accessing admin-specific routes', 'Access granted to admin routes only', 'High'),
-    ('AUTH-014', 'Manager accessing manager routes', 'Access granted to manager routes only', 'High'),
-    ('AUTH-015', 'Employee accessing restricted routes', 'Redirected to unauthorized page', 'High'),
-    ('AUTH-016', 'Client accessing client-specific routes', 'Access granted to client routes only', 'High'),
-    ('AUTH-017', 'Unauthenticated user accessing protected routes', 'Redirected to login', 'High'),
-]
-add_test_table(doc, '1.3 Role-Based Access Control', rbac_tests)
-
-# Dashboard Tests
-doc.add_heading('2. Dashboard Module Tests', level=1)
-
-superadmin_dash = [
-    ('DASH-001', 'Dashboard loads with statistics', 'All stat cards display correctly', 'High'),
-    ('DASH-002', 'Project statistics accuracy', 'Counts match actual project data', 'High'),
-    ('DASH-003', 'Task analytics display', 'Charts render with correct data', 'High'),
-    ('DASH-004', 'Resource overview widget', 'Resource list displays correctly', 'Medium'),
-    ('DASH-005', 'Recent activity feed', 'Shows recent updates', 'Medium'),
-    ('DASH-006', 'Dashboard refresh/reload', 'Data updates in real-time', 'Medium'),
-]
-add_test_table(doc, '2.1 SuperAdmin Dashboard', superadmin_dash)
-
-role_dash = [
-    ('DASH-007', 'Admin dashboard displays admin-specific data', 'Data filtered to admin scope', 'High'),
-    ('DASH-008', 'Manager dashboard shows managed resources', 'Team data displayed correctly', 'High'),
-    ('DASH-009', 'Employee dashboard shows personal tasks', 'Only assigned tasks visible', 'High'),
-    ('DASH-010', 'Client dashboard shows client projects', 'Only client-specific data shown', 'High'),
-    ('DASH-011', 'Overdue task count accuracy', 'Correct count of overdue items', 'High'),
-]
-add_test_table(doc, '2.2 Role-Specific Dashboards', role_dash)
-
-# Resource Management Tests
-doc.add_heading('3. Resource Management Tests', level=1)
-
-add_resource = [
-    ('RES-001', 'Add new resource with valid data', 'Resource created, appears in list', 'High'),
-    ('RES-002', 'Add resource with duplicate email', 'Error message displayed', 'High'),
-    ('RES-003', 'Add resource with all optional fields', 'All data saved correctly', 'Medium'),
-    ('RES-004', 'Add resource - password toggle functionality', 'Toggle controls password requirements', 'Medium'),
-    ('RES-005', 'Form validation for required fields', 'Validation errors shown', 'High'),
-]
-add_test_table(doc, '3.1 Add Resource', add_resource)
-
-edit_resource = [
-    ('RES-006', 'Edit resource basic info', 'Changes saved and reflected', 'High'),
-    ('RES-007', 'Edit resource department assignment', 'Department updated correctly', 'Medium'),
-    ('RES-008', 'Edit resource skills', 'Skills array updated', 'Medium'),
-    ('RES-009', 'Change resource status (active/inactive)', 'Status reflected in UI', 'High'),
-]
-add_test_table(doc, '3.2 Edit Resource', edit_resource)
-
-view_delete_resource = [
-    ('RES-010', 'View resource details modal', 'All information displayed', 'Medium'),
-    ('RES-011', 'Delete resource with confirmation', 'Resource removed from system', 'High'),
-    ('RES-012', 'Delete resource cancellation', 'Resource remains unchanged', 'Medium'),
-    ('RES-013', 'Search resources by name', 'Filtered results displayed', 'Medium'),
-    ('RES-014', 'Filter resources by department', 'Correct filtering applied', 'Medium'),
-]
-add_test_table(doc, '3.3 View & Delete Resource', view_delete_resource)
-
-# Client Management Tests
-doc.add_heading('4. Client Management Tests', level=1)
-
-client_tests = [
-    ('CLI-001', 'Add new client with valid data', 'Client created successfully', 'High'),
-    ('CLI-002', 'Add client with required fields only', 'Client created with defaults', 'Medium'),
-    ('CLI-003', 'Edit client company name', 'Name updated in all references', 'High'),
-    ('CLI-004', 'Edit client contact details', 'Contact info saved correctly', 'Medium'),
-    ('CLI-005', 'Delete client without projects', 'Client removed successfully', 'High'),
-    ('CLI-006', 'Delete client with projects', 'Warning/prevention shown', 'High'),
-    ('CLI-007', 'View client details', 'All client data displayed', 'Medium'),
-    ('CLI-008', 'Search clients', 'Search results accurate', 'Medium'),
-]
-add_test_table(doc, '4.1 Client CRUD Operations', client_tests)
-
-# Project Management Tests
-doc.add_heading('5. Project Management Tests', level=1)
-
-project_crud = [
-    ('PROJ-001', 'Create new project with valid data', 'Project created, visible in list', 'High'),
-    ('PROJ-002', 'Create project linked to client', 'Client association saved', 'High'),
-    ('PROJ-003', 'Edit project name and description', 'Updates saved correctly', 'High'),
-    ('PROJ-004', 'Edit project dates', 'Date ranges validated', 'High'),
-    ('PROJ-005', 'Delete project', 'Project and relations cleaned up', 'High'),
-    ('PROJ-006', 'View project details modal', 'All project info displayed', 'Medium'),
-]
-add_test_table(doc, '5.1 Project CRUD Operations', project_crud)
-
-project_status = [
-    ('PROJ-007', 'Project progress calculation', 'Progress derived from tasks', 'High'),
-    ('PROJ-008', 'Seven-stage Kanban view', 'Stages display correctly', 'High'),
-    ('PROJ-009', 'Project status change', 'Status updates reflected', 'High'),
-    ('PROJ-010', 'Project filtering by status', 'Correct filter results', 'Medium'),
-    ('PROJ-011', 'Project search functionality', 'Search works accurately', 'Medium'),
-]
-add_test_table(doc, '5.2 Project Progress & Status', project_status)
-
-# Task Management Tests
-doc.add_heading('6. Task Management Tests', level=1)
-
-task_crud = [
-    ('TASK-001', 'Create task with required fields', 'Task created successfully', 'High'),
-    ('TASK-002', 'Create task with all fields', 'All data saved correctly', 'Medium'),
-    ('TASK-003', 'Create subtask under parent task', 'Subtask linked correctly', 'High'),
-    ('TASK-004', 'Edit task details', 'Changes saved and reflected', 'High'),
-    ('TASK-005', 'Delete task', 'Task removed, subtasks handled', 'High'),
-    ('TASK-006', 'Archive task', 'Task archived, not visible', 'Medium'),
-]
-add_test_table(doc, '6.1 Task CRUD Operations', task_crud)
-
-kanban_tests = [
-    ('TASK-007', 'Kanban board loads with tasks', 'All tasks in correct columns', 'High'),
-    ('TASK-008', 'Drag and drop task between columns', 'Task status updated', 'High'),
-    ('TASK-009', 'WIP limits enforcement', 'Limits prevent over-assignment', 'Medium'),
-    ('TASK-010', 'Kanban filtering by project', 'Correct tasks displayed', 'Medium'),
-    ('TASK-011', 'Kanban filtering by assignee', 'Assignee filter works', 'Medium'),
-]
-add_test_table(doc, '6.2 Kanban Board', kanban_tests)
-
-task_details = [
-    ('TASK-012', 'Task modal opens with details', 'All info displayed', 'High'),
-    ('TASK-013', 'Task priority change', 'Priority updated', 'Medium'),
-    ('TASK-014', 'Task due date change', 'Date validated and saved', 'High'),
-    ('TASK-015', 'Task assignee change', 'Assignee updated', 'High'),
-    ('TASK-016', 'Task completion with comment', 'Comment modal works', 'Medium'),
-    ('TASK-017', 'Time estimate input', 'Estimate saved correctly', 'Low'),
-    ('TASK-018', 'Task tags management', 'Tags add/remove works', 'Low'),
-]
-add_test_table(doc, '6.3 Task Details', task_details)
-
-# Lead Management Tests
-doc.add_heading('7. Lead Management Tests', level=1)
-
-lead_crud = [
-    ('LEAD-001', 'Add new lead with valid data', 'Lead created successfully', 'High'),
-    ('LEAD-002', 'Edit lead details', 'Changes saved correctly', 'High'),
-    ('LEAD-003', 'Delete lead', 'Lead removed from system', 'High'),
-    ('LEAD-004', 'View lead details modal', 'All lead info displayed', 'Medium'),
-    ('LEAD-005', 'Lead grouping/filtering', 'Groups display correctly', 'Medium'),
-    ('LEAD-006', 'Lead status change', 'Status updated', 'High'),
-]
-add_test_table(doc, '7.1 Lead CRUD Operations', lead_crud)
-
-followup_tests = [
-    ('LEAD-007', 'Schedule follow-up for lead', 'Follow-up created', 'High'),
-    ('LEAD-008', 'Complete follow-up', 'Follow-up marked complete', 'High'),
-    ('LEAD-009', 'Reschedule follow-up', 'New date/time saved', 'High'),
-    ('LEAD-010', 'Overdue follow-up reminder', 'Reminder popup displays', 'High'),
-    ('LEAD-011', 'Follow-up list view', 'List displays correctly', 'Medium'),
-    ('LEAD-012', 'Filter follow-ups by status', 'Filter works correctly', 'Medium'),
-]
-add_test_table(doc, '7.2 Follow-up Management', followup_tests)
-
-lead_settings = [
-    ('LEAD-013', 'Add lead source setting', 'Setting saved', 'Medium'),
-    ('LEAD-014', 'Add lead status setting', 'Setting saved', 'Medium'),
-    ('LEAD-015', 'Edit/Delete settings', 'Settings updated/removed', 'Medium'),
-]
-add_test_table(doc, '7.3 Lead Settings', lead_settings)
-
-# Calendar Tests
-doc.add_heading('8. Calendar Module Tests', level=1)
-
-calendar_display = [
-    ('CAL-001', 'Calendar grid loads', 'Current month displayed', 'High'),
-    ('CAL-002', 'Navigate to previous/next month', 'Month changes correctly', 'High'),
-    ('CAL-003', 'Events display on correct dates', 'Dates aligned properly', 'High'),
-    ('CAL-004', 'Meeting requests display', 'Pending requests visible', 'Medium'),
-    ('CAL-005', 'Task deadlines on calendar', 'Deadlines marked correctly', 'Medium'),
-]
-add_test_table(doc, '8.1 Calendar Display', calendar_display)
-
-event_mgmt = [
-    ('CAL-006', 'Create new event', 'Event saved and displayed', 'High'),
-    ('CAL-007', 'Edit existing event', 'Changes saved', 'High'),
-    ('CAL-008', 'Delete event with confirmation', 'Event removed', 'High'),
-    ('CAL-009', 'Approve meeting request', 'Request converted to event', 'High'),
-    ('CAL-010', 'Cancel/decline meeting', 'Request status updated', 'High'),
-]
-add_test_table(doc, '8.2 Event Management', event_mgmt)
-
-# Reports Tests
-doc.add_heading('9. Reports Module Tests', level=1)
-
-report_tests = [
-    ('REP-001', 'Report page loads with default view', 'Initial data displayed', 'High'),
-    ('REP-002', 'Project status report generation', 'Accurate data displayed', 'High'),
-    ('REP-003', 'Task completion report', 'Data matches actual tasks', 'High'),
-    ('REP-004', 'Resource utilization report', 'Utilization calculated correctly', 'Medium'),
-    ('REP-005', 'Export report to Excel/CSV', 'File downloads correctly', 'High'),
-    ('REP-006', 'Filter reports by date range', 'Date filter works', 'Medium'),
-    ('REP-007', 'Filter reports by project/client', 'Filter applied correctly', 'Medium'),
-]
-add_test_table(doc, '9.1 Reports', report_tests)
-
-# Documents Tests
-doc.add_heading('10. Document Management Tests', level=1)
-
-doc_tests = [
-    ('DOC-001', 'Upload document', 'File uploaded successfully', 'High'),
-    ('DOC-002', 'View document', 'Document viewer opens', 'High'),
-    ('DOC-003', 'Download document', 'File downloads correctly', 'High'),
-    ('DOC-004', 'Delete document', 'Document removed', 'High'),
-    ('DOC-005', 'Document search', 'Search results accurate', 'Medium'),
-    ('DOC-006', 'Document access by role', 'Access controlled properly', 'High'),
-]
-add_test_table(doc, '10.1 Document Operations', doc_tests)
-
-# Knowledge Base Tests
-doc.add_heading('11. Knowledge Base Tests', level=1)
-
-kb_tests = [
-    ('KB-001', 'Knowledge page loads', 'Content displayed', 'High'),
-    ('KB-002', 'View knowledge project detail', 'Details shown correctly', 'High'),
-    ('KB-003', 'Add knowledge entry', 'Entry saved', 'Medium'),
-    ('KB-004', 'Edit knowledge entry', 'Changes saved', 'Medium'),
-    ('KB-005', 'Delete knowledge entry', 'Entry removed', 'Medium'),
-    ('KB-006', 'Search knowledge base', 'Search works', 'Medium'),
-]
-add_test_table(doc, '11.1 Knowledge Base Operations', kb_tests)
-
-# MOM Tests
-doc.add_heading('12. MOM (Minutes of Meeting) Generator Tests', level=1)
-
-mom_tests = [
-    ('MOM-001', 'Create new MOM', 'MOM saved successfully', 'High'),
-    ('MOM-002', 'Add attendees to MOM', 'Attendees saved', 'High'),
-    ('MOM-003', 'Add agenda items', 'Agenda items saved', 'High'),
-    ('MOM-004', 'Add action items', 'Action items saved', 'High'),
-    ('MOM-005', 'Generate PDF export', 'PDF created correctly', 'High'),
-    ('MOM-006', 'Edit existing MOM', 'Changes saved', 'Medium'),
-    ('MOM-007', 'Delete MOM', 'MOM removed', 'Medium'),
-]
-add_test_table(doc, '12.1 MOM Operations', mom_tests)
-
-# Expense Tests
-doc.add_heading('13. Expense Management Tests', level=1)
-
-expense_tests = [
-    ('EXP-001', 'Add new expense', 'Expense created', 'High'),
-    ('EXP-002', 'Edit expense details', 'Changes saved', 'High'),
-    ('EXP-003', 'Delete expense', 'Expense removed', 'High'),
-    ('EXP-004', 'Expense approval workflow', 'Approval status updates', 'High'),
-    ('EXP-005', 'Filter expenses by status', 'Filter works', 'Medium'),
-    ('EXP-006', 'Expense reports', 'Report generated correctly', 'Medium'),
-]
-add_test_table(doc, '13.1 Expense Operations', expense_tests)
-
-# Settings Tests
-doc.add_heading('14. Settings Module Tests', level=1)
-
-hierarchy_tests = [
-    ('SET-001', 'Add department', 'Department created', 'Medium'),
-    ('SET-002', 'Edit department', 'Department updated', 'Medium'),
-    ('SET-003', 'Delete department', 'Department removed', 'Medium'),
-    ('SET-004', 'Add designation', 'Designation created', 'Medium'),
-]
-add_test_table(doc, '14.1 Hierarchy Settings', hierarchy_tests)
-
-project_settings = [
-    ('SET-005', 'Configure project stages', 'Stages saved', 'Medium'),
-    ('SET-006', 'Configure task statuses', 'Statuses saved', 'Medium'),
-    ('SET-007', 'Status settings visibility', 'Settings apply correctly', 'Medium'),
-]
-add_test_table(doc, '14.2 Project & Status Settings', project_settings)
-
-theme_tests = [
-    ('SET-008', 'Theme toggle (light/dark)', 'Theme changes applied', 'Medium'),
-    ('SET-009', 'Profile information update', 'Profile saved', 'Medium'),
-    ('SET-010', 'Profile image upload', 'Image saved and displayed', 'Low'),
-]
-add_test_table(doc, '14.3 Theme & Profile Settings', theme_tests)
-
-# UI/UX Tests
-doc.add_heading('15. UI/UX & Cross-Cutting Tests', level=1)
-
-responsive_tests = [
-    ('UI-001', 'Desktop viewport (1920x1080)', 'Layout displays correctly', 'High'),
-    ('UI-002', 'Tablet viewport (768x1024)', 'Responsive layout', 'Medium'),
-    ('UI-003', 'Mobile viewport (375x667)', 'Mobile-friendly layout', 'Medium'),
-]
-add_test_table(doc, '15.1 Responsive Design', responsive_tests)
-
-modal_tests = [
-    ('UI-004', 'Modal open animation', 'Smooth animation', 'Low'),
-    ('UI-005', 'Modal close on backdrop click', 'Modal closes', 'Medium'),
-    ('UI-006', 'Modal close on Escape key', 'Modal closes', 'Low'),
-    ('UI-007', 'Form reset on modal close', 'Form cleared', 'Medium'),
-]
-add_test_table(doc, '15.2 Modal Interactions', modal_tests)
-
-notification_tests = [
-    ('UI-008', 'Success toast notifications', 'Toast appears and auto-dismisses', 'High'),
-    ('UI-009', 'Error toast notifications', 'Error displayed clearly', 'High'),
-    ('UI-010', 'Loading states (spinners)', 'Spinners show during operations', 'Medium'),
-    ('UI-011', 'Skeleton loaders', 'Skeletons during data fetch', 'Medium'),
-]
-add_test_table(doc, '15.3 Notifications & Feedback', notification_tests)
-
-nav_tests = [
-    ('UI-012', 'Sidebar navigation', 'Links work correctly', 'High'),
-    ('UI-013', 'Breadcrumb navigation', 'Breadcrumbs accurate', 'Low'),
-    ('UI-014', 'Browser back/forward', 'Navigation works', 'Medium'),
-]
-add_test_table(doc, '15.4 Navigation', nav_tests)
-
-# Real-time Tests
-doc.add_heading('16. Real-time Updates Tests', level=1)
-
-realtime_tests = [
-    ('RT-001', 'Task update reflects in real-time', 'Other users see update', 'High'),
-    ('RT-002', 'New project appears without refresh', 'Real-time subscription works', 'High'),
-    ('RT-003', 'Event changes on calendar', 'Calendar updates live', 'Medium'),
-    ('RT-004', 'Notification badge updates', 'Badge reflects new items', 'Medium'),
-]
-add_test_table(doc, '16.1 Real-time Updates', realtime_tests)
-
-# Error Handling Tests
-doc.add_heading('17. Error Handling Tests', level=1)
-
-error_tests = [
-    ('ERR-001', 'Network error during data fetch', 'User-friendly error shown', 'High'),
-    ('ERR-002', 'Firebase offline mode', 'App handles gracefully', 'Medium'),
-    ('ERR-003', 'Form submission failure', 'Error message displayed', 'High'),
-    ('ERR-004', 'Invalid route access (404)', '404 page or redirect', 'Medium'),
-    ('ERR-005', 'Session expiry handling', 'User prompted to re-login', 'High'),
-]
-add_test_table(doc, '17.1 Error Handling', error_tests)
-
-# Test Count Summary
-doc.add_heading('Appendix: Test Count Summary', level=1)
-
-summary_table = doc.add_table(rows=19, cols=5)
-summary_table.style = 'Table Grid'
-
-# Header
-header = summary_table.rows[0]
-for i, text in enumerate(['Module', 'Test Cases', 'High Priority', 'Medium', 'Low']):
-    header.cells[i].text = text
-    for paragraph in header.cells[i].paragraphs:
-        for run in paragraph.runs:
-            run.bold = True
-
-summary_data = [
-    ('Authentication', '17', '14', '3', '0'),
-    ('Dashboard', '11', '8', '3', '0'),
-    ('Resource Management', '14', '7', '7', '0'),
-    ('Client Management', '8', '4', '4', '0'),
-    ('Project Management', '11', '6', '5', '0'),
-    ('Task Management', '18', '10', '6', '2'),
-    ('Lead Management', '15', '8', '7', '0'),
-    ('Calendar', '10', '6', '4', '0'),
-    ('Reports', '7', '4', '3', '0'),
-    ('Documents', '6', '4', '2', '0'),
-    ('Knowledge Base', '6', '2', '4', '0'),
-    ('MOM Generator', '7', '4', '3', '0'),
-    ('Expenses', '6', '4', '2', '0'),
-    ('Settings', '10', '0', '9', '1'),
-    ('UI/UX', '14', '4', '7', '3'),
-    ('Real-time', '4', '2', '2', '0'),
-    ('Error Handling', '5', '3', '2', '0'),
-    ('TOTAL', '169', '90', '73', '6'),
-]
 
-for i, row_data in enumerate(summary_data):
-    row = summary_table.rows[i + 1]
-    for j, text in enumerate(row_data):
-        row.cells[j].text = text
-        # Bold the TOTAL row
-        if row_data[0] == 'TOTAL':
-            for paragraph in row.cells[j].paragraphs:
-                for run in paragraph.runs:
-                    run.bold = True
-
-# Footer
-doc.add_paragraph()
-doc.add_paragraph('Document Version: 1.0')
-doc.add_paragraph('Created: January 19, 2026')
-doc.add_paragraph('Project: COSMOS PM Admin Panel')
-
-# Save
-output_path = r'd:\COSMOS\COSMOS_Test_Case_Plan.docx'
-doc.save(output_path)
-print(f'Word document saved to: {output_path}')
\ No newline at end of file
+    for row, row_data in zip(rows[1:], summary_data):
+        for cell, text in zip(row.cells, row_data):
+            cell.text = text
+            # Bold the TOTAL row
+            if row_data[0] == 'TOTAL':
+                for paragraph in cell.paragraphs:
+                    for run in paragraph.runs:
+                        run.bold = True
+
+def count_row(label, counts, positions):
+    return (label, str(sum(counts)),
+            *(str(counts[position]) if position is not None else '0' for position in positions))
+
+def export_csv(catalog_file=None, output_file=None, results=None):
+    """Write the test cases of a catalog to one CSV file, with the module as the first column"""
+    catalog_file = catalog_file or CATALOG_FILE
+    output_file = output_file or os.path.splitext(OUTPUT_FILE)[0] + '.csv'
+    cases, columns, _ = plan_cases(catalog_file, results)
+    cells = row_cells(columns)
+
+    # Rows are written as they are read, so memory does not grow with the catalog
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(('Module', *columns))
+        writer.writerows((case.module, *cells(case)) for case in cases)
+    print(f'CSV export saved to: {output_file}')
+    return output_file
+
+def export_xlsx(catalog_file=None, output_file=None, results=None):
+    """Write the test cases of a catalog to an XLSX workbook with one sheet per module"""
+    if openpyxl is None:
+        raise ImportError('XLSX export needs openpyxl (pip install openpyxl)')
+    catalog_file = catalog_file or CATALOG_FILE
+    output_file = output_file or os.path.splitext(OUTPUT_FILE)[0] + '.xlsx'
+    cases, columns, _ = plan_cases(catalog_file, results)
+    cells = row_cells(columns)
+
+    # Write-only sheets spool their rows to disk instead of keeping a cell object per value
+    workbook = openpyxl.Workbook(write_only=True)
+    sheets = {}
+    bold = Font(bold=True)
+    for case in cases:
+        sheet = sheets.get(case.module)
+        if sheet is None:
+            sheet = sheets[case.module] = workbook.create_sheet(sheet_title(case.module, sheets.values()))
+            header = []
+            for text in columns:
+                cell = WriteOnlyCell(sheet, value=text)
+                cell.font = bold
+                header.append(cell)
+            sheet.append(header)
+        sheet.append(cells(case))
+
+    workbook.save(output_file)
+    print(f'XLSX export saved to: {output_file}')
+    return output_file
+
+def sheet_title(module, sheets):
+    # Excel sheet names are at most 31 characters, unique regardless of case
+    taken = {sheet.title.lower() for sheet in sheets}
+    base = SHEET_TITLE_INVALID.sub('-', module).strip("'")[:SHEET_TITLE_LENGTH] or 'Tests'
+    title, n = base, 2
+    while title.lower() in taken:
+        suffix = f' ({n})'
+        title = base[:SHEET_TITLE_LENGTH - len(suffix)] + suffix
+        n += 1
+    return title
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate the test case plan DOCX from the test case catalog')
+    parser.add_argument('--catalog', default=CATALOG_FILE, help='CSV test case catalog (default: %(default)s)')
+    parser.add_argument('--output', default=OUTPUT_FILE, help='DOCX file to write (default: %(default)s)')
+    parser.add_argument('--csv', metavar='PATH', nargs='?', const=True,
+                        help='also export the test cases to CSV (default: next to the DOCX)')
+    parser.add_argument('--xlsx', metavar='PATH', nargs='?', const=True,
+                        help='also export the test cases to XLSX, one sheet per module (default: next to the DOCX)')
+    parser.add_argument('--parallel', action='store_true',
+                        help='render the sections in worker processes and merge them in order')
+    parser.add_argument('--workers', type=int, help='size of the --parallel worker pool (default: CPU count)')
+    parser.add_argument('--results', metavar='PATH', nargs='+',
+                        help='merge the latest status per Test ID from JUnit XML / JSON result files, '
+                             'directories or globs into the plan and exports')
+    parser.add_argument('--stale-days', type=int, default=STALE_AFTER_DAYS,
+                        help='report results older than this many days before the newest run (default: %(default)s)')
+    args = parser.parse_args()
+    if args.xlsx and openpyxl is None:
+        parser.error('--xlsx needs openpyxl (pip install openpyxl)')
+    STALE_AFTER_DAYS = args.stale_days
+    # Exports given without a path go next to the DOCX actually written
+    if args.csv is True:
+        args.csv = os.path.splitext(args.output)[0] + '.csv'
+    if args.xlsx is True:
+        args.xlsx = os.path.splitext(args.output)[0] + '.xlsx'
+
+    results = load_results(args.results) if args.results else None
+    create_test_plan(args.catalog, args.output, args.parallel, args.workers, results)
+    if args.csv:
+        export_csv(args.catalog, args.csv, results)
+    if args.xlsx:
+        export_xlsx(args.catalog, args.xlsx, results)
@@ -0,0 +1,103 @@
+"""
+Linear-time document assembly on top of python-docx
+
+Several python-docx Document methods cost time proportional to the document built so far:
+every add_* call scans the body for the trailing <w:sectPr>, paragraph and table styles are
+resolved by walking the style part, add_table measures the page through doc.sections, each
+picture's shape id comes from an XPath over every @id in the document, and doc.paragraphs[-1]
+rebuilds the whole paragraph list. DocumentAssembler keeps a handle to the sectPr, caches
+style ids, page width and the next shape id, and returns the element it just added, so
+appending a block costs the same at the end of a 500-page manual as at the start.
+"""
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_BREAK
+from docx.oxml import OxmlElement
+from docx.oxml.shape import CT_Inline
+from docx.oxml.table import CT_Tbl
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+class DocumentAssembler:
+    """
+    Append-only front end for a python-docx Document.
+
+    add_paragraph, add_heading, add_table and add_page_break mirror the Document methods
+    of the same name, so rendering code can take either. add_picture returns the paragraph
+    holding the picture rather than the InlineShape, which is the handle callers need.
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self._container = document._body
+        self._block_width = document._block_width
+        self._style_ids = {}
+        self._next_shape_id = document.part.next_id
+
+        # Found once here; python-docx would search the body for it on every insert
+        self._body = document.element.body
+        self._sectPr = self._body.sectPr
+
+    @property
+    def element(self):
+        return self.document.element
+
+    @property
+    def part(self):
+        return self.document.part
+
+    def style_id(self, name, style_type=WD_STYLE_TYPE.PARAGRAPH):
+        """Resolve a style name once; None means the default style for style_type"""
+        key = (name, style_type)
+        if key not in self._style_ids:
+            self._style_ids[key] = self.document.part.get_style_id(name, style_type)
+        return self._style_ids[key]
+
+    def next_shape_id(self):
+        shape_id = self._next_shape_id
+        self._next_shape_id += 1
+        return shape_id
+
+    def append(self, element):
+        """Add a ready-made body element (w:p, w:tbl) at the end of the document"""
+        if self._sectPr is not None:
+            self._sectPr.addprevious(element)
+        else:
+            self._body.append(element)
+        return element
+
+    def add_paragraph(self, text='', style=None):
+        p = OxmlElement('w:p')
+        self.append(p)
+        paragraph = Paragraph(p, self._container)
+        if text:
+            paragraph.add_run(text)
+        if style is not None:
+            p.style = self.style_id(style)
+        return paragraph
+
+    def add_heading(self, text='', level=1):
+        if not 0 <= level <= 9:
+            raise ValueError("level must be in range 0-9, got %d" % level)
+        return self.add_paragraph(text, 'Title' if level == 0 else f"Heading {level}")
+
+    def add_page_break(self):
+        paragraph = self.add_paragraph()
+        paragraph.add_run().add_break(WD_BREAK.PAGE)
+        return paragraph
+
+    def add_table(self, rows, cols, style=None):
+        tbl = CT_Tbl.new_tbl(rows, cols, self._block_width)
+        self.append(tbl)
+        table = Table(tbl, self._container)
+        if style is not None:
+            tbl.tblStyle_val = self.style_id(style, WD_STYLE_TYPE.TABLE)
+        return table
+
+    def add_picture(self, image, width=None, height=None):
+        """Add image (a path or stream) in its own paragraph and return that paragraph"""
+        paragraph = self.add_paragraph()
+        rId, picture = self.document.part.get_or_add_image(image)
+        cx, cy = picture.scaled_dimensions(width, height)
+        inline = CT_Inline.new_pic_inline(self.next_shape_id(), rId, picture.filename, cx, cy)
+        paragraph.add_run()._r.add_drawing(inline)
+        return paragraph
@@ -0,0 +1,74 @@
+"""
+Streaming OOXML writer for DOCX outputs too large to keep in memory
+
+python-docx keeps the whole document.xml tree alive until Document.save(). StreamingDocument
+lets callers keep rendering with the normal python-docx API into a scratch document, but
+flush() serializes the body elements rendered so far straight into the word/document.xml
+zip entry and drops them, so the tree never holds more than the blocks since the last flush.
+Styles, numbering, media and relationships are taken from the scratch package on close().
+"""
+import io
+import re
+import zipfile
+
+from docx.oxml.ns import qn
+from lxml import etree
+
+DOCUMENT_PART = 'word/document.xml'
+NAMESPACE_DECLARATION = re.compile(rb' xmlns:(\w+)="([^"]*)"')
+
+class StreamingDocument:
+    """Stream the body of a python-docx Document into a .docx file as it is rendered"""
+
+    def __init__(self, path, document):
+        # document must still have an empty body; it becomes the scratch renderer
+        self.document = document
+        self._next_shape_id = 1
+        self._root_namespaces = {
+            (prefix.encode(), uri.encode()) for prefix, uri in document.element.nsmap.items() if prefix
+        }
+        self._zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        self._stream = self._zip.open(DOCUMENT_PART, 'w', force_zip64=True)
+
+        # Reuse the template's own root element and section properties around the streamed body
+        xml = etree.tostring(document.element, encoding='UTF-8', xml_declaration=True, standalone=True)
+        body_start = xml.index(b'<w:body>') + len(b'<w:body>')
+        self._stream.write(xml[:body_start])
+        self._tail = xml[body_start:]
+
+    def flush(self):
+        """Write out every body element rendered since the last flush and release it"""
+        body = self.document.element.body
+        sectPr = body.sectPr
+        for element in list(body):
+            if element is sectPr:
+                continue
+            # python-docx numbers drawings from what is left in the body, so keep ids unique here
+            for doc_pr in element.iter(qn('wp:docPr')):
+                doc_pr.set('id', str(self._next_shape_id))
+                doc_pr.set('name', f"Picture {self._next_shape_id}")
+                self._next_shape_id += 1
+            self._stream.write(self._serialize(element))
+            body.remove(element)
+
+    def _serialize(self, element):
+        # lxml repeats every in-scope namespace on a detached element; the root already declares them
+        xml = etree.tostring(element, encoding='UTF-8')
+        tag_end = xml.index(b'>')
+        start_tag = NAMESPACE_DECLARATION.sub(
+            lambda m: b'' if m.groups() in self._root_namespaces else m.group(0), xml[:tag_end])
+        return start_tag + xml[tag_end:]
+
+    def close(self):
+        """Finish document.xml and copy the remaining package parts from the scratch document"""
+        self.flush()
+        self._stream.write(self._tail)
+        self._stream.close()
+
+        package = io.BytesIO()
+        self.document.save(package)
+        with zipfile.ZipFile(package) as scratch:
+            for item in scratch.infolist():
+                if item.filename != DOCUMENT_PART:
+                    self._zip.writestr(item, scratch.read(item.filename))
+        self._zip.close()
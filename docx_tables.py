@@ -0,0 +1,87 @@
+"""
+Bulk table builder shared by the DOCX generators (generate_user_manual.py, convert_to_word.py)
+
+python-docx rebuilds its row and cell proxy lists on every table.rows[i] / row.cells access,
+so filling a table cell by cell is quadratic in the number of rows. add_bulk_table instead
+appends ready-made <w:tr> elements straight to the table XML in a single pass.
+"""
+from copy import deepcopy
+
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from lxml.etree import SubElement
+
+# SubElement with pre-resolved tag names is several times cheaper than OxmlElement per cell
+W_T, W_BR, W_TAB, XML_SPACE = qn('w:t'), qn('w:br'), qn('w:tab'), qn('xml:space')
+
+def add_bulk_table(doc, rows, style='Table Grid', header_fill=None, header_color=None):
+    """
+    Append a table to doc from an iterable of rows of cell strings and return it.
+
+    The first row is the header and fixes the column count: extra cells are dropped
+    and missing cells are left empty. With no rows, or an empty header, no table is
+    added and None is returned, as Word rejects rows without cells. Header cells are bold, optionally shaded with
+    header_fill (hex string such as '4F81BD') and coloured with header_color (RGBColor).
+    rows may be any iterator, so generated tables never need to be held in memory.
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if not header:
+        return None
+
+    table = doc.add_table(rows=1, cols=len(header), style=style)
+    tbl = table._tbl
+
+    # python-docx's own first row is the template for every row that follows
+    row_template = tbl.tr_lst[0]
+    tbl.remove(row_template)
+
+    header_row = deepcopy(row_template)
+    run_template = _header_run_template(header_fill, header_color)
+    if header_fill:
+        shading = OxmlElement('w:shd')
+        shading.set(qn('w:fill'), header_fill)
+        for tc in header_row.iterchildren(qn('w:tc')):
+            tc.get_or_add_tcPr().append(deepcopy(shading))
+    _fill_row(header_row, header, run_template)
+    tbl.append(header_row)
+
+    plain_run = OxmlElement('w:r')
+    for cells in rows:
+        tr = deepcopy(row_template)
+        _fill_row(tr, cells, plain_run)
+        tbl.append(tr)
+
+    return table
+
+def _header_run_template(header_fill, header_color):
+    run = OxmlElement('w:r')
+    rPr = OxmlElement('w:rPr')
+    rPr.append(OxmlElement('w:b'))
+    if header_color is not None:
+        color = OxmlElement('w:color')
+        color.set(qn('w:val'), str(header_color))
+        rPr.append(color)
+    run.append(rPr)
+    return run
+
+def _fill_row(tr, cells, run_template):
+    for tc, text in zip(tr.iterchildren(qn('w:tc')), cells):
+        run = deepcopy(run_template)
+        append_text(run, text)
+        tc[-1].append(run)
+
+def append_text(run, text):
+    """Append text to a <w:r> element as Run.text would: line breaks become <w:br/>, tabs <w:tab/>"""
+    for i, line in enumerate(text.split('\n')):
+        if i:
+            SubElement(run, W_BR)
+        for j, chunk in enumerate(line.split('\t')):
+            if j:
+                SubElement(run, W_TAB)
+            if chunk:
+                t = SubElement(run, W_T)
+                t.text = chunk
+                # Edge whitespace is dropped by Word unless marked as preserved
+                if chunk != chunk.strip():
+                    t.set(XML_SPACE, 'preserve')
@@ -5,13 +5,8 @@ Creates a professional, print-friendly HTML user manual for the COSMOS Manager P
 
 OUTPUT_FILE = r'd:\COSMOS\user-manuals\manager-user-manual.html'
 
-html_content = '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>COSMOS Manager Panel - User Manual</title>
-    <style>
+# Shared with the HTML renderer in generate_user_manual.py
+MANUAL_STYLESHEET = '''\
         :root {
             --primary-color: #10b981;
             --secondary-color: #059669;
@@ -336,7 +331,16 @@ html_content = '''<!DOCTYPE html>
                 scroll-behavior: smooth;
             }
         }
-    </style>
+'''
+
+html_content = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>COSMOS Manager Panel - User Manual</title>
+    <style>
+''' + MANUAL_STYLESHEET + '''    </style>
 </head>
 <body>
 
@@ -1314,12 +1318,13 @@ html_content = '''<!DOCTYPE html>
 </html>
 '''
 
-try:
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-    print(f"✅ Manager User Manual created successfully!")
-    print(f"📄 Location: {OUTPUT_FILE}")
-    print(f"📌 Open the file in your browser to view")
-    print(f"🖨️  Use browser's Print function (Ctrl+P) to save as PDF")
-except Exception as e:
-    print(f"❌ Error creating manual: {e}")
+if __name__ == '__main__':
+    try:
+        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        print(f"✅ Manager User Manual created successfully!")
+        print(f"📄 Location: {OUTPUT_FILE}")
+        print(f"📌 Open the file in your browser to view")
+        print(f"🖨️  Use browser's Print function (Ctrl+P) to save as PDF")
+    except Exception as e:
+        print(f"❌ Error creating manual: {e}")
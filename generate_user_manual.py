@@ -1,175 +1,1065 @@
 
+import argparse
+import base64
+import csv
+import glob
+import hashlib
+import html
+import io
+import json
 import os
+import pickle
+import queue
 import re
+import shutil
+import subprocess
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from copy import deepcopy
+from itertools import chain, takewhile
 from docx import Document
-from docx.shared import Inches, Pt, RGBColor
+from docx.shared import Emu, Inches, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import nsdecls
+from docx.oxml.ns import nsdecls, qn
 from docx.oxml import parse_xml
+from lxml import etree
+
+from docx_assembly import DocumentAssembler
+from docx_stream import StreamingDocument
+from docx_tables import add_bulk_table, append_text
+from json_stream import iter_json_array
+from generate_manager_manual import MANUAL_STYLESHEET
+
+# Pillow is optional: without it images are embedded as-is
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    PILImage = None
+
+# Pygments is optional: without it code blocks stay plain monospace
+try:
+    import pygments
+    from pygments.lexers import get_lexer_by_name
+    from pygments.styles import get_style_by_name
+    from pygments.util import ClassNotFound
+except ImportError:
+    pygments = None
 
 # Configuration
 MARKDOWN_FILE = r'd:\COSMOS\docs\USER_WORKFLOW_GUIDE.md'
 OUTPUT_FILE = r'd:\COSMOS\COSMOS_User_Manual.docx'
 IMAGE_BASE_DIR = r'd:\COSMOS\docs'  # Images are relative to the markdown file
+CACHE_DIR = r'd:\COSMOS\.manual_cache'
+IMAGE_WIDTH = Inches(6)
+IMAGE_DPI = 150  # Pixel density of the downscaled derivatives
+CODE_FONT = 'Consolas'
+CODE_FONT_SIZE = Pt(9)
+CODE_FILL = 'F5F5F5'  # Light grey behind code listings
+HIGHLIGHT_STYLE = 'friendly'  # Pygments style for code listings; None leaves them plain
+# Local diagram renderers by code fence language; {source} and {output} become file paths.
+# Diagrams whose renderer is not installed are shown as code listings instead.
+DIAGRAM_COMMANDS = {
+    'mermaid': ['mmdc', '--quiet', '--input', '{source}', '--output', '{output}',
+                '--backgroundColor', 'white', '--scale', '2'],
+    'dot': ['dot', '-Tpng', '{source}', '-o', '{output}'],
+}
+DIAGRAM_TIMEOUT = 120  # Seconds before a hung renderer is abandoned
+CHAPTER_LEVEL = 2  # In chapter mode, # and ## headings start a new chapter file
+# Roles with their own manual, recognised by name in ## panel chapters and ### headings of shared chapters
+ROLE_PATTERNS = {
+    'Super Admin': re.compile(r'\bsuper admins?\b', re.IGNORECASE),
+    'Admin': re.compile(r'(?<!super )\badmins?\b', re.IGNORECASE),
+    'Manager': re.compile(r'\bmanagers?\b', re.IGNORECASE),
+    'Employee': re.compile(r'\bemployees?\b', re.IGNORECASE),
+    'Client': re.compile(r'\bclients?\b', re.IGNORECASE),
+}
+ROLE_SKIPPED_SECTIONS = {'Table of Contents'}  # Lists every panel, so it only belongs in the full manual
+SECTION_CACHE_VERSION = 2  # Bump when rendering changes so cached sections are re-rendered
+PARSER_VERSION = 5  # Bump when lexer output changes so cached block ASTs are re-parsed
+# In-memory entries kept by the image and highlight caches, so a long watch session stays bounded
+IMAGE_MEMORY_ENTRIES = 256
+HIGHLIGHT_MEMORY_ENTRIES = 4096
+FANOUT_QUEUE_SIZE = 256  # Blocks buffered per renderer when rendering several formats at once
+FANOUT_DONE = object()
+
+# Block events yielded by the parser and consumed by the DOCX renderer
+Heading = namedtuple('Heading', ['level', 'text'])
+# base_dir is set on pictures from included fragments, whose paths are relative to the fragment
+Picture = namedtuple('Picture', ['alt', 'path', 'base_dir'], defaults=[None])
+Table = namedtuple('Table', ['lines'])
+Alert = namedtuple('Alert', ['alert_type', 'text'])
+Quote = namedtuple('Quote', ['text'])
+ListItem = namedtuple('ListItem', ['style', 'text'])
+Rule = namedtuple('Rule', [])
+Paragraph = namedtuple('Paragraph', ['text'])
+CodeBlock = namedtuple('CodeBlock', ['language', 'text'])
+Include = namedtuple('Include', ['path'])  # Replaced by the included file's blocks before rendering
+DataTable = namedtuple('DataTable', ['path'])  # CSV, JSON or JSON Lines file rendered as a table
 
-def create_manual():
-    print(f"Reading markdown from: {MARKDOWN_FILE}")
+def create_manual(markdown_file=None, output_file=None, image_base_dir=None, subtitle='User Workflow Guide',
+                  incremental=False, parallel_images=True, streaming=False, html_file=None,
+                  chapters_dir=None, combined=True, workers=None, highlight_style=None):
+    # highlight_style, when given, is applied to this process: worker processes don't inherit the setting
+    if highlight_style is not None:
+        use_highlight_style(highlight_style)
+    markdown_file = markdown_file or MARKDOWN_FILE
+    output_file = output_file or OUTPUT_FILE
+    base_dir = image_base_dir or IMAGE_BASE_DIR
+
+    print(f"Reading markdown from: {markdown_file}")
     
-    if not os.path.exists(MARKDOWN_FILE):
-        print(f"Error: File not found: {MARKDOWN_FILE}")
+    if not os.path.exists(markdown_file):
+        print(f"Error: File not found: {markdown_file}")
         return
 
-    with open(MARKDOWN_FILE, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    if chapters_dir:
+        # Chapters render in their own processes; the combined manual is spliced together from them
+        return create_chapters(markdown_file, chapters_dir, base_dir, subtitle,
+                               output_file if combined else None, workers)
 
-    doc = Document()
-    
-    # Set default style
-    style = doc.styles['Normal']
-    style.font.name = 'Calibri'
-    style.font.size = Pt(11)
-
-    # Title Page
-    doc.add_heading('COSMOS PM Admin Panel', 0)
-    subtitle = doc.add_paragraph('User Workflow Guide')
-    subtitle.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    doc.add_page_break()
-
-    # State variables for parsing
-    in_table = False
-    table_data = []
-    in_code_block = False
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i].rstrip()
-        
-        # Skip YAML frontmatter if present (simple check)
-        if i == 0 and line == '---':
-            i += 1
-            while i < len(lines) and lines[i].strip() != '---':
-                i += 1
-            i += 1
-            continue
+    # Diagrams render on background threads while the document is being assembled
+    DIAGRAM_CACHE.prefetch(collect_diagrams(markdown_file))
 
-        # detection of table end
-        if in_table:
-            if not line.strip().startswith('|'):
-                # Process collected table
-                process_table(doc, table_data)
-                table_data = []
-                in_table = False
-            else:
-                table_data.append(line)
-                i += 1
-                continue
+    docx_renderer = DocxRenderer(output_file, base_dir, subtitle, streaming)
+    renderers = []
+    if incremental:
+        # Only sections edited since the last build are parsed and rendered
+        with open(markdown_file, 'r', encoding='utf-8') as f:
+            build_incremental(docx_renderer.assembler, f, base_dir, docx_renderer.writer, markdown_file)
+    else:
+        # Decode, resize and recompress every referenced image up front, across all cores
+        if parallel_images:
+            IMAGE_CACHE.preload(collect_image_paths(markdown_file, base_dir), IMAGE_WIDTH)
+        renderers.append(docx_renderer)
+    html_renderer = HtmlRenderer(html_file, base_dir, subtitle) if html_file else None
+    if html_renderer:
+        renderers.append(html_renderer)
 
-        # Headers
-        if line.startswith('#'):
-            level = len(line.split()[0])
-            text = line.lstrip('#').strip()
-            # Clean up links in headers if any [Link](#anchor)
-            text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
-            doc.add_heading(text, level=level)
-            i += 1
-            continue
+    # Blocks are streamed from the source or its cached AST, so memory stays flat however large the guide is
+    if renderers:
+        render_concurrently(load_blocks(markdown_file), renderers)
+
+    docx_renderer.close()
+    if html_renderer:
+        html_renderer.close()
+
+class DocxRenderer:
+    """Renders blocks into the DOCX manual, after a title page"""
 
-        # Images: ![Alt](path)
-        img_match = re.match(r'!\[(.*?)\]\((.*?)\)', line)
-        if img_match:
-            alt_text = img_match.group(1)
-            img_path = img_match.group(2)
-            
-            # Resolve path
-            full_img_path = os.path.join(IMAGE_BASE_DIR, img_path.lstrip('./').replace('/', os.sep))
-            
-            print(f"Found image: {full_img_path}")
-            if os.path.exists(full_img_path):
+    def __init__(self, output_file, base_dir, subtitle, streaming=False):
+        self.output_file = output_file
+        self.base_dir = base_dir
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        self.doc = new_document()
+        # Blocks are appended through the assembler so each one costs O(1) however long the manual gets
+        self.assembler = doc = DocumentAssembler(self.doc)
+
+        # In streaming mode body XML goes to the output file as it is rendered, keeping memory bounded
+        self.writer = StreamingDocument(output_file, self.doc) if streaming else None
+
+        # Title Page
+        doc.add_heading('COSMOS PM Admin Panel', 0)
+        subtitle_paragraph = doc.add_paragraph(subtitle)
+        subtitle_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        doc.add_page_break()
+
+    def render(self, block):
+        render_block(self.assembler, block, self.base_dir)
+        if self.writer:
+            self.writer.flush()
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+        else:
+            self.doc.save(self.output_file)
+        print(f"Document saved to {self.output_file}")
+
+def render_concurrently(blocks, renderers):
+    """
+    Fan one block stream out to several renderers, each consuming it on its own thread.
+    Bounded queues keep a fast renderer from running ahead of a slow one by more than
+    FANOUT_QUEUE_SIZE blocks, so memory stays flat whatever the source size.
+    """
+    if len(renderers) == 1:
+        for block in blocks:
+            renderers[0].render(block)
+        return
+
+    queues = [queue.Queue(maxsize=FANOUT_QUEUE_SIZE) for _ in renderers]
+    errors = []
+
+    def consume(renderer, blocks_queue):
+        failed = False
+        while (block := blocks_queue.get()) is not FANOUT_DONE:
+            # After a failure keep draining so the producer never blocks on a full queue
+            if not failed:
                 try:
-                    doc.add_picture(full_img_path, width=Inches(6))
-                    last_paragraph = doc.paragraphs[-1] 
-                    last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    
-                    # Add caption
-                    caption = doc.add_paragraph(alt_text)
-                    caption.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    caption.style = 'Caption'
+                    renderer.render(block)
                 except Exception as e:
-                    doc.add_paragraph(f"[Image: {alt_text} - Error inserting image]")
-                    print(f"Error inserting image: {e}")
+                    errors.append(e)
+                    failed = True
+
+    threads = [threading.Thread(target=consume, args=pair) for pair in zip(renderers, queues)]
+    for thread in threads:
+        thread.start()
+    try:
+        for block in blocks:
+            for blocks_queue in queues:
+                blocks_queue.put(block)
+    finally:
+        for blocks_queue in queues:
+            blocks_queue.put(FANOUT_DONE)
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+
+_base_document = None
+
+def new_document():
+    """Return a blank document with the manual's base styles, built from a template parsed once per process"""
+    global _base_document
+    if _base_document is None:
+        _base_document = Document()
+        
+        # Set default style
+        style = _base_document.styles['Normal']
+        style.font.name = 'Calibri'
+        style.font.size = Pt(11)
+    return deepcopy(_base_document)
+
+def convert_batch(source, output_dir=None, workers=None):
+    """
+    Convert every markdown file in a directory (or matching a glob) within one process pool.
+    Each worker imports python-docx once and converts many files; a failing file is reported
+    and the rest of the batch carries on. Returns the list of sources that failed.
+    """
+    pattern = os.path.join(source, '*.md') if os.path.isdir(source) else source
+    sources = sorted(glob.glob(pattern))
+    if not sources:
+        print(f"No markdown files match: {pattern}")
+        return []
+
+    failures = []
+    batch_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for markdown_file in sources:
+            stem = os.path.splitext(os.path.basename(markdown_file))[0]
+            output_file = os.path.join(output_dir or os.path.dirname(markdown_file), f"{stem}.docx")
+            futures[pool.submit(convert_file, markdown_file, output_file, HIGHLIGHT_STYLE or 'none')] = markdown_file
+
+        for future in as_completed(futures):
+            markdown_file = futures[future]
+            try:
+                print(f"[ok]     {future.result():6.2f}s  {markdown_file}")
+            except Exception as e:
+                failures.append(markdown_file)
+                print(f"[failed]          {markdown_file}: {e}")
+
+    print(f"Converted {len(sources) - len(failures)}/{len(sources)} files "
+          f"in {time.perf_counter() - batch_start:.2f}s")
+    return failures
+
+def convert_file(markdown_file, output_file, highlight_style=None):
+    # Batch worker: one file per call, images handled inline since files already run in parallel
+    start = time.perf_counter()
+    create_manual(markdown_file, output_file, image_base_dir=os.path.dirname(markdown_file),
+                  subtitle=subtitle_for(markdown_file), parallel_images=False, highlight_style=highlight_style)
+    return time.perf_counter() - start
+
+def subtitle_for(markdown_file):
+    stem = os.path.splitext(os.path.basename(markdown_file))[0]
+    return stem.replace('-', ' ').replace('_', ' ').title()
+
+def create_chapters(markdown_file, chapters_dir, base_dir, subtitle, combined_file=None, workers=None):
+    """
+    Split a guide at its top-level (#/##) headings and render each chapter to its own DOCX in a
+    process pool. With combined_file, every worker also hands back its rendered body as an OOXML
+    fragment and the fragments are spliced in order into one document, without re-rendering.
+    Returns the titles of chapters that failed.
+    """
+    with open(markdown_file, 'r', encoding='utf-8') as f:
+        chapters = list(iter_sections(f, max_level=CHAPTER_LEVEL))
+
+    combined = DocxRenderer(combined_file, base_dir, subtitle) if combined_file else None
+    failures = []
+    build_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for number, lines in enumerate(chapters, 1):
+            title = chapter_title(lines)
+            output_file = os.path.join(chapters_dir, f"{number:02d}-{heading_slug(title) or 'chapter'}.docx")
+            futures.append((title, pool.submit(render_chapter, lines, output_file, base_dir,
+                                               f"{subtitle} - {title}", combined is not None, markdown_file,
+                                               HIGHLIGHT_STYLE or 'none')))
+
+        # Collected in order so each fragment can be spliced in as soon as its chapter is done
+        for title, future in futures:
+            try:
+                elapsed, fragment = future.result()
+                print(f"[ok]     {elapsed:6.2f}s  {title}")
+            except Exception as e:
+                failures.append(title)
+                print(f"[failed]          {title}: {e}")
+                continue
+            if combined and not failures:
+                SECTION_CACHE.restore(combined.assembler, fragment)
+
+    if combined:
+        if failures:
+            print(f"Combined manual not written: {len(failures)} chapter(s) failed")
+        else:
+            combined.close()
+    print(f"Rendered {len(chapters) - len(failures)}/{len(chapters)} chapters "
+          f"in {time.perf_counter() - build_start:.2f}s")
+    return failures
+
+def render_chapter(lines, output_file, base_dir, subtitle, fragment=False, source_file=None, highlight_style=None):
+    # Chapter worker: returns its render time and, for the combined manual, its body as a fragment
+    start = time.perf_counter()
+    if highlight_style is not None:
+        use_highlight_style(highlight_style)
+    renderer = DocxRenderer(output_file, base_dir, subtitle)
+    body = renderer.doc.element.body
+    last = body.sectPr.getprevious()
+
+    blocks = list(expand_includes(iter_blocks(lines, frontmatter=False), source_file))
+    DIAGRAM_CACHE.prefetch(diagram_sources(blocks))
+    for block in blocks:
+        renderer.render(block)
+
+    entry = SECTION_CACHE.fragment(renderer.assembler, elements_after(body, last)) if fragment else None
+    renderer.close()
+    return time.perf_counter() - start, entry
+
+def chapter_title(lines):
+    if lines[0].startswith('#'):
+        return LINK_PATTERN.sub(r'\1', lines[0].lstrip('#').strip())
+    return 'Introduction'
+
+def create_role_manuals(markdown_file=None, output_dir=None, image_base_dir=None, roles=None, workers=None):
+    """
+    Parse the guide once into a role-tagged section index and render one DOCX per role in a
+    process pool. Each manual gets that role's panel chapters plus every shared section, such
+    as Getting Started. Returns the roles whose manual failed.
+    """
+    markdown_file = markdown_file or MARKDOWN_FILE
+    base_dir = image_base_dir or IMAGE_BASE_DIR
+    output_dir = output_dir or os.path.dirname(OUTPUT_FILE)
+    stem = os.path.splitext(os.path.basename(OUTPUT_FILE))[0]
+
+    print(f"Reading markdown from: {markdown_file}")
+    with open(markdown_file, 'r', encoding='utf-8') as f:
+        index = role_index(f, markdown_file)
+    blocks = [block for _, section_blocks in index for block in section_blocks]
+
+    # Shared images and diagrams are prepared once here rather than by every role's worker
+    IMAGE_CACHE.preload((picture_path(block, base_dir) for block in blocks if isinstance(block, Picture)),
+                        IMAGE_WIDTH)
+    diagrams = list(diagram_sources(blocks))
+    DIAGRAM_CACHE.prefetch(diagrams)
+    for language, source in diagrams:
+        DIAGRAM_CACHE.get(language, source)
+
+    failures = []
+    build_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for role in roles or ROLE_PATTERNS:
+            role_blocks = [block for tags, section_blocks in index if tags is None or role in tags
+                           for block in section_blocks]
+            output_file = os.path.join(output_dir, f"{stem}_{role.replace(' ', '_')}.docx")
+            futures[pool.submit(render_role_manual, role, role_blocks, output_file, base_dir,
+                                HIGHLIGHT_STYLE or 'none')] = role
+
+        for future in as_completed(futures):
+            role = futures[future]
+            try:
+                print(f"[ok]     {future.result():6.2f}s  {role}")
+            except Exception as e:
+                failures.append(role)
+                print(f"[failed]          {role}: {e}")
+
+    print(f"Rendered {len(futures) - len(failures)}/{len(futures)} role manuals "
+          f"in {time.perf_counter() - build_start:.2f}s")
+    return failures
+
+def role_index(f, source_file=None):
+    """
+    Split a guide at #, ## and ### headings into (roles, blocks) pairs. roles is the set of
+    roles a section is for, or None for sections shared by all of them. A ## chapter naming a
+    role (Manager Panel) tags everything under it; in shared chapters a ### heading naming
+    roles (For Super Admins & Admins) tags just that section.
+    """
+    index = []
+    chapter_roles = None
+    skipped = False
+    for lines in iter_sections(f, max_level=CHAPTER_LEVEL + 1):
+        title = chapter_title(lines)
+        level = len(lines[0].split()[0]) if lines[0].startswith('#') else 0
+        roles = {role for role, pattern in ROLE_PATTERNS.items() if pattern.search(title)} or None
+        if level <= CHAPTER_LEVEL:
+            # The guide's own # title names no panel, even when it mentions one
+            chapter_roles = roles if level == CHAPTER_LEVEL else None
+            skipped = title in ROLE_SKIPPED_SECTIONS
+            roles = chapter_roles
+        elif chapter_roles:
+            roles = chapter_roles
+        if not skipped:
+            index.append((roles, list(expand_includes(iter_blocks(lines, frontmatter=False), source_file))))
+    return index
+
+def render_role_manual(role, blocks, output_file, base_dir, highlight_style=None):
+    # Role worker: renders already-parsed blocks, so the guide is never re-read
+    start = time.perf_counter()
+    if highlight_style is not None:
+        use_highlight_style(highlight_style)
+    renderer = DocxRenderer(output_file, base_dir, f"{role} Guide")
+    for block in blocks:
+        renderer.render(block)
+    renderer.close()
+    return time.perf_counter() - start
+
+def watch(source=None, output_dir=None, interval=0.2, debounce=0.3):
+    """
+    Keep one warm process rebuilding DOCX outputs whenever their markdown, included fragments
+    or screenshots change.
+    source is a markdown file or a directory watched recursively. A burst of saves is coalesced
+    into one rebuild once nothing has changed for `debounce` seconds, and only the documents
+    that read a changed file are rebuilt, incrementally.
+    """
+    source = source or MARKDOWN_FILE
+    dependencies = {}  # markdown file -> every path its last build read
+    stamps = {}        # path -> (mtime, size) when last seen
+    dirty = set()
+    last_change = 0.0
+
+    print(f"Watching {source} for changes (Ctrl+C to stop)")
+    try:
+        while True:
+            if os.path.isdir(source):
+                sources = set(glob.glob(os.path.join(source, '**', '*.md'), recursive=True))
             else:
-                doc.add_paragraph(f"[Image: {alt_text} - File not found]")
-            
-            i += 1
-            continue
+                sources = {source}
+            for markdown_file in sources - dependencies.keys():
+                dependencies[markdown_file] = {markdown_file}
+                dirty.add(markdown_file)
+            for markdown_file in dependencies.keys() - sources:
+                del dependencies[markdown_file]
+                dirty.discard(markdown_file)
 
-        # Table start detection
-        if line.strip().startswith('|'):
-            in_table = True
-            table_data.append(line)
-            i += 1
-            continue
+            changed = set()
+            for path in set().union(*dependencies.values()):
+                stamp = file_stamp(path)
+                if path in stamps and stamps[path] != stamp:
+                    changed.add(path)
+                stamps[path] = stamp
+            if changed:
+                dirty.update(md for md, paths in dependencies.items() if not paths.isdisjoint(changed))
+                last_change = time.monotonic()
 
-        # Blockquotes / Alerts
-        if line.strip().startswith('>'):
-            alert_type = "NOTE"
-            content = line.lstrip('>').strip()
-            
-            # Check for GitHub alert syntax > [!NOTE]
-            if content.startswith('[!') and ']' in content:
-                alert_type_match = re.match(r'\[!(.*?)\]', content)
-                if alert_type_match:
-                    alert_type = alert_type_match.group(1)
-                    # Next lines usually contain the content
-                    i += 1
-                    content = ""
-                    while i < len(lines) and lines[i].strip().startswith('>'):
-                        content += lines[i].strip().lstrip('>').strip() + " "
-                        i += 1
-                    # Add alert box
-                    add_alert(doc, alert_type, content)
-                    continue
-            
-            # Standard blockquote
-            p = doc.add_paragraph(content)
-            p.style = 'Quote'
-            i += 1
+            if dirty and time.monotonic() - last_change >= debounce:
+                for markdown_file in sorted(dirty):
+                    dependencies[markdown_file] = rebuild_watched(markdown_file, output_dir)
+                    for path in dependencies[markdown_file]:
+                        stamps[path] = file_stamp(path)
+                dirty.clear()
+
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+def rebuild_watched(markdown_file, output_dir):
+    """Rebuild one watched document and return the paths it depends on"""
+    base_dir = os.path.dirname(markdown_file)
+    if markdown_file == MARKDOWN_FILE and not output_dir:
+        output_file, subtitle = OUTPUT_FILE, 'User Workflow Guide'
+    else:
+        stem = os.path.splitext(os.path.basename(markdown_file))[0]
+        output_file = os.path.join(output_dir or base_dir, f"{stem}.docx")
+        subtitle = subtitle_for(markdown_file)
+
+    start = time.perf_counter()
+    try:
+        create_manual(markdown_file, output_file, image_base_dir=base_dir, subtitle=subtitle,
+                      incremental=True, parallel_images=False)
+        print(f"Rebuilt {output_file} in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except Exception as e:
+        # A half-written edit must not stop the watcher
+        print(f"Error rebuilding {markdown_file}: {e}")
+
+    paths = {markdown_file}
+    try:
+        build_dependencies(markdown_file, base_dir, paths)
+    except (OSError, UnicodeDecodeError, ValueError):
+        # Keep what was found before the failure (e.g. an include cycle) so a fix to it is noticed
+        pass
+    return paths
+
+def build_dependencies(markdown_file, base_dir, paths=None):
+    """
+    Every file a build of markdown_file reads: fragments, screenshots and table data.
+    Paths are added to the paths set as they are found, so a caller passing its own set keeps
+    them even when reading the sources fails partway.
+    """
+    paths = {markdown_file} if paths is None else paths
+    paths.update(included_files(cached_blocks(markdown_file), markdown_file))
+    for block in load_blocks(markdown_file):
+        if isinstance(block, Picture):
+            paths.add(picture_path(block, base_dir))
+        elif isinstance(block, DataTable):
+            paths.add(block.path)
+    return paths
+
+def file_stamp(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+class LineReader:
+    """Iterates over right-stripped source lines with one line of lookahead"""
+
+    def __init__(self, f):
+        self._lines = (line.rstrip() for line in f)
+        self._pending = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._pending is not None:
+            line, self._pending = self._pending, None
+            return line
+        return next(self._lines)
+
+    def peek(self):
+        # Returns the next line without consuming it, or None at end of input
+        if self._pending is None:
+            self._pending = next(self._lines, None)
+        return self._pending
+
+# Precompiled patterns used by the line lexers
+LINK_PATTERN = re.compile(r'\[([^\]]+)\]\(([^\)]+)\)')
+IMAGE_PATTERN = re.compile(r'!\[(.*?)\]\((.*?)\)')
+ALERT_PATTERN = re.compile(r'\[!(.*?)\]')
+NUMBERED_PATTERN = re.compile(r'\d+\.(\s*)')
+DIRECTIVE_PATTERN = re.compile(r'<!--\s*(include|table):\s*(.+?)\s*-->$')
+DIVIDER_CELL_PATTERN = re.compile(r':?-+:?')
+# A backtick fence's info string may not contain backticks, so ```inline``` text opens no block
+FENCE_PATTERN = re.compile(r'(`{3,}(?=[^`]*$)|~{3,})\s*(\S*)')
+
+def skip_frontmatter(reader):
+    # Skip YAML frontmatter if present (simple check)
+    if reader.peek() == '---':
+        next(reader)
+        for line in reader:
+            if line.strip() == '---':
+                break
+
+def iter_blocks(f, frontmatter=True):
+    """Parse markdown from a file object (or any iterable of lines) and yield one block event at a time"""
+    reader = LineReader(f)
+    if frontmatter:
+        skip_frontmatter(reader)
+
+    # Each line is classified once, by a lookup on its first character
+    lexers = LINE_LEXERS
+    for line in reader:
+        stripped = line.strip()
+        if not stripped:
             continue
 
-        # Lists
-        if line.strip().startswith('- ') or line.strip().startswith('* '):
-            text = line.strip()[2:]
-            text = parse_inline_formatting(text)
-            p = doc.add_paragraph(text, style='List Bullet')
-            i += 1
+        lexer = lexers.get(stripped[0])
+        block = lexer(line, stripped, reader) if lexer else None
+        if block is None:
+            # Standard Paragraph
+            block = Paragraph(parse_inline_formatting(line))
+        yield block
+
+def lex_heading(line, stripped, reader):
+    # Indented hashes are plain text
+    if not line.startswith('#'):
+        return None
+    level = len(line.split()[0])
+    text = line.lstrip('#').strip()
+    # Clean up links in headers if any [Link](#anchor)
+    return Heading(level, LINK_PATTERN.sub(r'\1', text))
+
+def lex_image(line, stripped, reader):
+    # Images: ![Alt](path)
+    img_match = IMAGE_PATTERN.match(line)
+    if img_match:
+        return Picture(img_match.group(1), img_match.group(2))
+    return None
+
+def lex_table(line, stripped, reader):
+    # Keep collecting rows while the next line is still part of the table
+    table_lines = [line]
+    while reader.peek() is not None and reader.peek().lstrip().startswith('|'):
+        table_lines.append(next(reader))
+    return Table(table_lines)
+
+def lex_quote(line, stripped, reader):
+    content = stripped.lstrip('>').strip()
+
+    # Check for GitHub alert syntax > [!NOTE]
+    alert_type_match = ALERT_PATTERN.match(content)
+    if alert_type_match:
+        # Following quoted lines hold the alert content
+        content = ""
+        while reader.peek() is not None and reader.peek().lstrip().startswith('>'):
+            content += next(reader).strip().lstrip('>').strip() + " "
+        return Alert(alert_type_match.group(1), content)
+
+    # Standard blockquote
+    return Quote(content)
+
+def lex_dash(line, stripped, reader):
+    if stripped.startswith('- '):
+        return ListItem('List Bullet', parse_inline_formatting(stripped[2:]))
+    # Horizontal Rule
+    if stripped == '---':
+        return Rule()
+    return None
+
+def lex_star(line, stripped, reader):
+    if stripped.startswith('* '):
+        return ListItem('List Bullet', parse_inline_formatting(stripped[2:]))
+    return None
+
+def lex_numbered(line, stripped, reader):
+    num_match = NUMBERED_PATTERN.match(stripped)
+    if not num_match:
+        return None
+    # "1.Text" without a space keeps its number, as before
+    text = stripped[num_match.end():] if num_match.group(1) else stripped
+    return ListItem('List Number', parse_inline_formatting(text))
+
+def lex_fence(line, stripped, reader):
+    fence_match = FENCE_PATTERN.match(stripped)
+    if not fence_match:
+        return None
+    fence, language = fence_match.groups()
+    indent = len(line) - len(stripped)
+
+    # Everything up to the closing fence (or end of file) is verbatim, so it is taken in bulk
+    # without classifying each line; the fence's own indentation is removed from every line
+    code_lines = takewhile(lambda code_line: not closes_fence(code_line, fence), reader)
+    return CodeBlock(language, '\n'.join(
+        code_line[min(indent, len(code_line) - len(code_line.lstrip())):] for code_line in code_lines))
+
+def closes_fence(line, fence):
+    # Only the fence character, at least as many times as it opened, and nothing else: ```bash stays code
+    stripped = line.strip()
+    return len(stripped) >= len(fence) and stripped == fence[0] * len(stripped)
+
+def lex_directive(line, stripped, reader):
+    # <!-- include: setup.md --> or <!-- table: roles.csv --> on a line of its own,
+    # with the path relative to the file containing the directive
+    directive_match = DIRECTIVE_PATTERN.match(stripped)
+    if directive_match:
+        return DIRECTIVE_BLOCKS[directive_match.group(1)](directive_match.group(2))
+    return None
+
+# First-character dispatch table for iter_blocks
+LINE_LEXERS = {
+    '#': lex_heading,
+    '!': lex_image,
+    '|': lex_table,
+    '>': lex_quote,
+    '-': lex_dash,
+    '*': lex_star,
+    '`': lex_fence,
+    '~': lex_fence,
+    '<': lex_directive,
+}
+DIRECTIVE_BLOCKS = {'include': Include, 'table': DataTable}
+LINE_LEXERS.update(dict.fromkeys('0123456789', lex_numbered))
+
+# Block types by name, used to rebuild blocks from the AST cache
+BLOCK_TYPES = {
+    block_type.__name__: block_type
+    for block_type in (Heading, Picture, Table, Alert, Quote, ListItem, Rule, Paragraph, CodeBlock, Include,
+                       DataTable)
+}
+AST_BATCH_SIZE = 1000
+
+def load_blocks(markdown_file):
+    """Yield the blocks of a markdown file with its include directives expanded"""
+    return expand_includes(cached_blocks(markdown_file), markdown_file)
+
+def cached_blocks(markdown_file, digest=None):
+    """
+    Yield the blocks of a markdown file, from the AST cache when the file is unchanged.
+    Cache entries are keyed by the SHA-256 of the source and PARSER_VERSION. A miss lexes the
+    file and writes the cache as it goes, so both paths stream in bounded memory.
+    """
+    digest = digest or file_digest(markdown_file)
+    cache_path = os.path.join(CACHE_DIR, 'ast', f"{digest}-v{parser_version()}.pickle")
+    try:
+        f = open(cache_path, 'rb')
+    except FileNotFoundError:
+        yield from parse_and_cache(markdown_file, cache_path)
+        return
+
+    with f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            for kind, fields in batch:
+                yield BLOCK_TYPES[kind](*fields)
+
+def parse_and_cache(markdown_file, cache_path):
+    # Blocks are stored as (type name, fields) batches so the cache doesn't depend on module paths
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    complete = False
+    try:
+        with open(markdown_file, 'r', encoding='utf-8') as src, open(tmp_path, 'wb') as out:
+            batch = []
+            for block in iter_blocks(src):
+                batch.append((type(block).__name__, tuple(block)))
+                if len(batch) == AST_BATCH_SIZE:
+                    pickle.dump(batch, out, pickle.HIGHEST_PROTOCOL)
+                    batch = []
+                yield block
+            if batch:
+                pickle.dump(batch, out, pickle.HIGHEST_PROTOCOL)
+        complete = True
+    finally:
+        # A consumer that stops early leaves no partial entry behind
+        if complete:
+            os.replace(tmp_path, cache_path)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+class FragmentCache:
+    """
+    Parsed blocks of included files, memoized by real path for the latest content hash, so a
+    fragment included from several places, or by several documents built in one process, is
+    lexed (or read from the AST cache) once. Blocks are kept with their own includes unexpanded,
+    so an edit to a nested fragment is still picked up.
+    """
+
+    def __init__(self):
+        self._blocks = {}  # path -> (digest, blocks) of the latest version read
+
+    def blocks(self, path):
+        # Raises OSError when the fragment cannot be read
+        digest = file_digest(path)
+        entry = self._blocks.get(path)
+        if entry is None or entry[0] != digest:
+            entry = self._blocks[path] = (digest, tuple(cached_blocks(path, digest)))
+        return entry[1]
+
+def expand_includes(blocks, source_file=None, stack=()):
+    """
+    Replace Include blocks with the blocks of the files they name, recursively. Data table
+    paths are resolved against the file containing them at the same time, and so are the
+    image paths of included fragments.
+    """
+    # Pictures in the top-level file keep resolving against the manual's image base directory
+    fragment_dir = os.path.dirname(os.path.realpath(source_file)) if source_file and stack else None
+    if source_file:
+        stack = (*stack, os.path.realpath(source_file))
+    for block in blocks:
+        if isinstance(block, DataTable):
+            yield DataTable(directive_path(block, source_file))
             continue
-            
-        if re.match(r'^\d+\.', line.strip()):
-            text = re.sub(r'^\d+\.\s+', '', line.strip())
-            text = parse_inline_formatting(text)
-            p = doc.add_paragraph(text, style='List Number')
-            i += 1
+        if fragment_dir and isinstance(block, Picture):
+            yield block._replace(base_dir=fragment_dir)
+            continue
+        if not isinstance(block, Include):
+            yield block
             continue
 
-        # Horizontal Rule
-        if line.strip() == '---':
-            doc.add_paragraph('_' * 40).alignment = WD_ALIGN_PARAGRAPH.CENTER
-            i += 1
+        path = directive_path(block, source_file)
+        if path in stack:
+            chain = ' -> '.join(os.path.basename(p) for p in (*stack, path))
+            raise ValueError(f"Include cycle: {chain}")
+        try:
+            fragment = FRAGMENT_CACHE.blocks(path)
+        except OSError:
+            yield Paragraph(f"[Include: {block.path} - File not found]")
             continue
+        yield from expand_includes(fragment, path, stack)
+
+def included_files(blocks, source_file=None, seen=None):
+    """Yield every file the blocks include, directly or through other fragments, once each"""
+    seen = set() if seen is None else seen
+    for block in blocks:
+        if isinstance(block, Include):
+            path = directive_path(block, source_file)
+            if path not in seen:
+                seen.add(path)
+                yield path
+                try:
+                    fragment = FRAGMENT_CACHE.blocks(path)
+                except OSError:
+                    continue
+                yield from included_files(fragment, path, seen)
+
+def directive_path(block, source_file=None):
+    source_dir = os.path.dirname(os.path.abspath(source_file)) if source_file else ''
+    return os.path.realpath(os.path.join(source_dir, block.path))
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def render_block(doc, block, base_dir=None):
+    """Append a single parsed block to the document"""
+    # One dict lookup per block, however many block types are registered
+    renderer = BLOCK_RENDERERS.get(type(block))
+    if renderer:
+        renderer.docx(doc, block, base_dir)
+
+def docx_heading(doc, block, base_dir):
+    doc.add_heading(block.text, level=block.level)
+
+def docx_picture(doc, block, base_dir):
+    add_image(doc, block.alt, picture_path(block, base_dir))
+
+def docx_table(doc, block, base_dir):
+    process_table(doc, block.lines)
+
+def docx_data_table(doc, block, base_dir):
+    add_data_table(doc, block.path)
+
+def docx_alert(doc, block, base_dir):
+    add_alert(doc, block.alert_type, block.text)
+
+def docx_quote(doc, block, base_dir):
+    doc.add_paragraph(block.text, style='Quote')
+
+def docx_list_item(doc, block, base_dir):
+    doc.add_paragraph(block.text, style=block.style)
+
+def docx_rule(doc, block, base_dir):
+    doc.add_paragraph('_' * 40).alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+def docx_paragraph(doc, block, base_dir):
+    doc.add_paragraph(block.text)
 
-        # Standard Paragraph
-        if line.strip():
-            text = parse_inline_formatting(line)
-            doc.add_paragraph(text)
+def docx_code_block(doc, block, base_dir):
+    diagram = DIAGRAM_CACHE.get(block.language, block.text)
+    if diagram:
+        add_diagram(doc, diagram)
+    else:
+        add_code_block(doc, block.text, HIGHLIGHT_CACHE.spans(block.text, block.language))
+
+def resolve_image_path(img_path, base_dir=None):
+    return os.path.join(base_dir or IMAGE_BASE_DIR, img_path.lstrip('./').replace('/', os.sep))
+
+def picture_path(block, base_dir=None):
+    if block.base_dir:
+        return fragment_image_path(block.path, block.base_dir)
+    return resolve_image_path(block.path, base_dir)
+
+def fragment_image_path(img_path, fragment_dir):
+    # Relative to the fragment file like its data tables, so ../ climbs out of the fragment's folder
+    if img_path.startswith('./'):
+        img_path = img_path[2:]
+    return os.path.normpath(os.path.join(fragment_dir, img_path.replace('/', os.sep)))
+
+def collect_image_paths(markdown_file, base_dir=None):
+    """Yield the resolved path of every image referenced by a markdown file"""
+    for block in load_blocks(markdown_file):
+        if isinstance(block, Picture):
+            yield picture_path(block, base_dir)
+
+def collect_diagrams(markdown_file):
+    """Yield (language, source) for every diagram block in a markdown file"""
+    return diagram_sources(load_blocks(markdown_file))
+
+def diagram_sources(blocks):
+    for block in blocks:
+        if isinstance(block, CodeBlock) and block.language in DIAGRAM_COMMANDS:
+            yield block.language, block.text
+
+def add_image(doc, alt_text, full_img_path):
+    print(f"Found image: {full_img_path}")
+    try:
+        # Identical derivatives share one media part: python-docx reuses image parts by SHA-1
+        image_data = IMAGE_CACHE.get(full_img_path, IMAGE_WIDTH)
+        picture_paragraph = doc.add_picture(io.BytesIO(image_data), width=IMAGE_WIDTH)
+        picture_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
-        i += 1
+        # Add caption
+        caption = doc.add_paragraph(alt_text, style='Caption')
+        caption.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    except FileNotFoundError:
+        doc.add_paragraph(f"[Image: {alt_text} - File not found]")
+    except Exception as e:
+        doc.add_paragraph(f"[Image: {alt_text} - Error inserting image]")
+        print(f"Error inserting image: {e}")
+
+class LruCache(OrderedDict):
+    """A dict that keeps only its max_entries most recently used items"""
+
+    def __init__(self, max_entries):
+        super().__init__()
+        self.max_entries = max_entries
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.max_entries:
+            self.popitem(last=False)
+
+class ImageCache:
+    """
+    Content-addressed store of downscaled image derivatives.
+    Entries are keyed by the SHA-256 of the source bytes and the target width in pixels,
+    kept on disk across builds and in memory for the IMAGE_MEMORY_ENTRIES most recently used.
+    """
+
+    def __init__(self, cache_dir, dpi=IMAGE_DPI):
+        self.cache_root = cache_dir
+        self.cache_dir = os.path.join(cache_dir, 'images')
+        self.dpi = dpi
+        self._digests = {}  # path -> ((path, mtime, size), source digest) of the latest version seen
+        self._derivatives = LruCache(IMAGE_MEMORY_ENTRIES)  # (digest, width_px) -> derivative bytes
+
+    def get(self, path, width):
+        """Return the derivative bytes of the image at path scaled for the given docx Length"""
+        return self.resolve(path, width)[2]
 
-    # Final flush if table was last
-    if in_table and table_data:
-        process_table(doc, table_data)
+    def resolve(self, path, width):
+        """Return (stamp, key, derivative bytes), building and memoising the derivative if needed"""
+        stamp, digest, source = self._digest(path)
+        key = (digest, round(width.inches * self.dpi))
+        data = self._derivatives.get(key)
+        if data is None:
+            data = self._load_or_build(key, path, source)
+            self._derivatives[key] = data
+        return stamp, key, data
 
-    doc.save(OUTPUT_FILE)
-    print(f"Document saved to {OUTPUT_FILE}")
+    def cached(self, path, width):
+        """Return the derivative if it is in memory or on disk, without building it; None otherwise"""
+        key = (self._digest(path)[1], round(width.inches * self.dpi))
+        data = self._derivatives.get(key)
+        if data is None:
+            data = self._read_cached(key)
+            if data is not None:
+                self._derivatives[key] = data
+        return data
+
+    def preload(self, paths, width, max_workers=None):
+        """Build the derivatives of many images in a process pool and keep them in memory"""
+        # Cache hits are read here; the pool is only started for images that need downscaling
+        # Lengths such as Inches don't survive pickling (the EMU count is re-read as inches), Emu does
+        jobs = []
+        for path in dict.fromkeys(paths):
+            try:
+                if self.cached(path, width) is None:
+                    jobs.append((path, Emu(width), self.cache_root, self.dpi))
+            except OSError:
+                continue  # Missing images are left for add_image to report in place
+        if len(jobs) < 2:
+            return
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            for result in pool.map(build_derivative, jobs, chunksize=4):
+                # Failed images are left for add_image to report in place
+                if result is not None:
+                    stamp, key, data = result
+                    self._digests[stamp[0]] = (stamp, key[0])
+                    self._derivatives[key] = data
+
+    def _digest(self, path):
+        # (stamp, digest, source bytes if they had to be read to hash them)
+        stat = os.stat(path)
+        stamp = (path, stat.st_mtime_ns, stat.st_size)
+        source = None
+        seen = self._digests.get(path)
+        if seen is not None and seen[0] == stamp:
+            return stamp, seen[1], source
+        with open(path, 'rb') as f:
+            source = f.read()
+        digest = hashlib.sha256(source).hexdigest()
+        self._digests[path] = (stamp, digest)
+        return stamp, digest, source
+
+    def _read_cached(self, key):
+        try:
+            with open(self._cache_path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _load_or_build(self, key, path, source):
+        data = self._read_cached(key)
+        if data is not None:
+            return data
+
+        if source is None:
+            with open(path, 'rb') as f:
+                source = f.read()
+        data = downscale_image(source, key[1])
+        write_atomic(self._cache_path(key), data)
+        return data
+
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, '{}-{}'.format(*key))
+
+def build_derivative(job):
+    # Process pool entry point for ImageCache.preload
+    path, width, cache_dir, dpi = job
+    try:
+        return ImageCache(cache_dir, dpi).resolve(path, width)
+    except Exception:
+        return None
+
+def downscale_image(data, width_px):
+    """Shrink an encoded image to at most width_px wide and recompress it"""
+    if PILImage is None:
+        return data
+    try:
+        img = PILImage.open(io.BytesIO(data))
+        img.load()
+    except OSError:
+        # Formats Pillow can't read (EMF, WMF, ...) go to python-docx untouched
+        return data
+
+    source_format = img.format
+    resized = img.width > width_px
+    if resized:
+        height = max(1, round(img.height * width_px / img.width))
+        img = img.resize((width_px, height), PILImage.LANCZOS)
+
+    out = io.BytesIO()
+    if source_format == 'JPEG':
+        img.convert('RGB').save(out, 'JPEG', quality=85, optimize=True)
+    else:
+        # Screenshots stay lossless so UI text remains crisp
+        if img.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'):
+            img = img.convert('RGBA')
+        img.save(out, 'PNG', optimize=True)
+
+    result = out.getvalue()
+    if not resized and len(result) >= len(data):
+        return data
+    return result
+
+IMAGE_CACHE = ImageCache(CACHE_DIR)
 
 def parse_inline_formatting(text):
     # Simple bold replacement **text** -> text (would be better to use runs, but for now simple cleanup)
@@ -181,53 +1071,75 @@ def parse_inline_formatting(text):
     return text.replace('**', '').replace('__', '')
 
 def process_table(doc, table_lines):
-    # Filter out divider lines (---|---|---)
-    content_lines = [line for line in table_lines if '---' not in line]
-    
-    if not content_lines:
-        return
+    # Header row is bold white text on a blue fill
+    add_bulk_table(doc, table_rows(table_lines), header_fill='4F81BD', header_color=RGBColor(255, 255, 255))
 
-    # Determine columns
-    header_row = content_lines[0].strip('|').split('|')
-    cols = len(header_row)
-    rows = len(content_lines)
-    
-    table = doc.add_table(rows=rows, cols=cols)
-    table.style = 'Table Grid'
-    
-    for r, line in enumerate(content_lines):
-        cells = line.strip().strip('|').split('|')
-        row_cells = table.rows[r].cells
-        for c, cell_text in enumerate(cells):
-            if c < len(row_cells):
-                row_cells[c].text = parse_inline_formatting(cell_text.strip())
-                
-                # Make header bold
-                if r == 0:
-                    for paragraph in row_cells[c].paragraphs:
-                        for run in paragraph.runs:
-                            run.bold = True
-                            run.font.color.rgb = RGBColor(255, 255, 255)
-                    
-                    # Add shading to header
-                    tcPr = row_cells[c]._tc.get_or_add_tcPr()
-                    shd = parse_xml(r'<w:shd {} w:fill="4F81BD"/>'.format(nsdecls('w')))
-                    tcPr.append(shd)
+def table_rows(table_lines):
+    """Yield the cell texts of each row of a pipe table, header first"""
+    for i, line in enumerate(table_lines):
+        cells = [cell_text.strip() for cell_text in line.strip().strip('|').split('|')]
+        # Only the line under the header can be the divider (---|:---:|---); later rows are data
+        # even when a cell, or every cell, is dashes
+        if i == 1 and all(DIVIDER_CELL_PATTERN.fullmatch(cell_text) for cell_text in cells):
+            continue
+        yield [parse_inline_formatting(cell_text) for cell_text in cells]
+
+def add_data_table(doc, path):
+    # Rows go from the file straight into table XML, so large tables never sit in a Python list
+    try:
+        add_bulk_table(doc, data_rows(path), header_fill='4F81BD', header_color=RGBColor(255, 255, 255))
+    except FileNotFoundError:
+        doc.add_paragraph(f"[Table: {os.path.basename(path)} - File not found]")
+    except (ValueError, csv.Error) as e:
+        doc.add_paragraph(f"[Table: {os.path.basename(path)} - Error reading table]")
+        print(f"Error reading table {path}: {e}")
+
+def data_rows(path):
+    """
+    Stream the rows of a CSV, JSON or JSON Lines file as lists of cell strings, header first.
+    JSON holds an array of objects (keys of the first object are the header) or of arrays
+    (the first array is the header); JSON Lines holds one such object or array per line.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in ('.csv', '.json', '.jsonl', '.ndjson'):
+        raise ValueError(f"unsupported table format: {extension}")
+    # Empty rows (blank CSV lines, [] or {}) have no cells: as the header they would make a zero-column table
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if extension == '.csv':
+            yield from filter(None, csv.reader(f))
+            return
+        items = iter_json_array(f) if extension == '.json' else (json.loads(line) for line in f if line.strip())
+        items = (item for item in items if item not in ([], {}))
+        first = next(items, None)
+        if first is None:
+            return
+        # Every row must have the shape of the first, or cells would be read out of strings and numbers
+        row_type = type(first)
+        if row_type not in (dict, list):
+            raise ValueError(f"table rows must be JSON objects or arrays, not {row_type.__name__}")
+        if row_type is dict:
+            header = list(first)
+            yield header
+        for number, item in enumerate(chain([first], items), 1):
+            if type(item) is not row_type:
+                raise ValueError(f"row {number} is a JSON {type(item).__name__}, expected {row_type.__name__}")
+            if row_type is dict:
+                yield [json_cell(item.get(key)) for key in header]
+            else:
+                yield [json_cell(value) for value in item]
+
+def json_cell(value):
+    if isinstance(value, str):
+        return value
+    return '' if value is None else json.dumps(value)
 
 def add_alert(doc, alert_type, content):
-    table = doc.add_table(rows=1, cols=1)
-    table.style = 'Table Grid'
+    table = doc.add_table(rows=1, cols=1, style='Table Grid')
     cell = table.cell(0, 0)
     
     # Color coding
-    color = "E3F2FD" # Blue/Info default
-    if "IMPORTANT" in alert_type or "CAUTION" in alert_type:
-        color = "FFEBEE" # Red
-    elif "WARNING" in alert_type:
-        color = "FFF3E0" # Orange
-    elif "TIP" in alert_type:
-        color = "E8F5E9" # Green
-        
+    color = ALERT_FILLS.get(alert_type, "E3F2FD") # Blue/Info default
+
     tcPr = cell._tc.get_or_add_tcPr()
     shd = parse_xml(r'<w:shd {} w:fill="{}"/>'.format(nsdecls('w'), color))
     tcPr.append(shd)
@@ -237,5 +1149,618 @@ def add_alert(doc, alert_type, content):
     run.bold = True
     p.add_run(content)
 
+def add_code_block(doc, code, spans=None):
+    # Plain listings are one monospaced run, highlighted ones a run per span; line breaks become <w:br/>
+    p = doc.add_paragraph()
+    p._p.get_or_add_pPr().append(parse_xml(r'<w:shd {} w:val="clear" w:fill="{}"/>'.format(nsdecls('w'), CODE_FILL)))
+
+    # Listings can run to thousands of spans, so each distinct format is set up through
+    # python-docx once and copied, rather than styling every run through the Font proxy
+    run_templates = {}
+    for text, color, bold, italic in spans or [(code, None, False, False)]:
+        span_format = (color, bold, italic)
+        if span_format not in run_templates:
+            run = p.add_run()
+            run.font.name = CODE_FONT
+            run.font.size = CODE_FONT_SIZE
+            if color:
+                run.font.color.rgb = RGBColor.from_string(color)
+            if bold:
+                run.bold = True
+            if italic:
+                run.italic = True
+            p._p.remove(run._r)
+            run_templates[span_format] = run._r
+        r = deepcopy(run_templates[span_format])
+        append_text(r, text)
+        p._p.append(r)
+
+def add_diagram(doc, path):
+    # Rendered diagrams go through the screenshot pipeline, so they are downscaled and deduplicated too
+    picture_paragraph = doc.add_picture(io.BytesIO(IMAGE_CACHE.get(path, IMAGE_WIDTH)), width=IMAGE_WIDTH)
+    picture_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+class HighlightCache:
+    """
+    Syntax-highlighted code as (text, color, bold, italic) spans shared by the DOCX and HTML
+    renderers. Results are keyed by a hash of the code, language, HIGHLIGHT_STYLE and Pygments
+    version, memoized in memory and persisted as JSON, so unchanged snippets are never re-lexed.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = os.path.join(cache_dir, 'highlight')
+        self._memo = LruCache(HIGHLIGHT_MEMORY_ENTRIES)
+        # The DOCX and HTML renderers may ask for the same snippet from their own threads
+        self._lock = threading.Lock()
+
+    def spans(self, code, language):
+        # None means render the listing plain
+        style = highlight_style()
+        if not style or not language:
+            return None
+        digest = hashlib.sha256(f"{pygments.__version__}\0{style}\0{language}\0".encode())
+        digest.update(code.encode('utf-8'))
+        key = digest.hexdigest()
+        with self._lock:
+            if key in self._memo:
+                return self._memo.get(key)
+            spans = self._memo[key] = self._load_or_highlight(key, code, language, style)
+            return spans
+
+    def _load_or_highlight(self, key, code, language, style):
+        cache_path = os.path.join(self.cache_dir, f"{key}.json")
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+        spans = highlight_code(code, language, style)
+        write_atomic(cache_path, json.dumps(spans).encode('utf-8'))
+        return spans
+
+def highlight_style():
+    """The Pygments style code is highlighted with, or None when highlighting is off or unavailable"""
+    return HIGHLIGHT_STYLE if pygments else None
+
+def use_highlight_style(name):
+    """Set the Pygments style for code listings in this process; 'none' leaves them plain"""
+    global HIGHLIGHT_STYLE
+    HIGHLIGHT_STYLE = None if name.lower() == 'none' else name
+
+def highlight_code(code, language, style_name):
+    try:
+        # Keep the listing's own leading and trailing newlines exactly as written
+        lexer = get_lexer_by_name(language, stripnl=False, ensurenl=False)
+        style = get_style_by_name(style_name)
+    except ClassNotFound:
+        return None
+
+    # Adjacent tokens that look the same are merged so each span becomes one run
+    spans = []
+    for token_type, text in lexer.get_tokens(code):
+        # Whitespace shows no colour, so it joins the previous span instead of starting a run
+        if spans and text.isspace():
+            spans[-1][0] += text
+            continue
+        # Styles only list some token types; others inherit from their parent, as in Pygments' formatters
+        while not style.styles_token(token_type):
+            token_type = token_type.parent
+        token_style = style.style_for_token(token_type)
+        span_format = [token_style['color'], token_style['bold'], token_style['italic']]
+        if spans and spans[-1][1:] == span_format:
+            spans[-1][0] += text
+        else:
+            spans.append([text, *span_format])
+    return spans
+
+class DiagramCache:
+    """
+    Diagram blocks rendered to PNG by the local commands in DIAGRAM_COMMANDS. Images are keyed
+    by a hash of the command and diagram source, so an unchanged diagram is never re-rendered.
+    prefetch() queues renders on a thread pool (the work happens in the renderer processes) and
+    get() only waits for the one diagram it needs.
+    """
+
+    def __init__(self, cache_dir, max_workers=None):
+        self.cache_dir = os.path.join(cache_dir, 'diagrams')
+        self.max_workers = max_workers
+        self._commands = {}
+        self._renders = {}
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def command(self, language):
+        """The render command for a fence language, or None if it has no installed renderer"""
+        if language not in self._commands:
+            command = DIAGRAM_COMMANDS.get(language)
+            self._commands[language] = command if command and shutil.which(command[0]) else None
+        return self._commands[language]
+
+    def renderers(self):
+        return ','.join(language for language in DIAGRAM_COMMANDS if self.command(language))
+
+    def prefetch(self, diagrams):
+        for language, source in diagrams:
+            self._submit(language, source)
+
+    def get(self, language, source):
+        """Path of the rendered PNG, or None to show the diagram as a code listing"""
+        future = self._submit(language, source)
+        return future.result() if future else None
+
+    def _submit(self, language, source):
+        command = self.command(language)
+        if command is None:
+            return None
+        key = hashlib.sha256('\0'.join([*command, source]).encode('utf-8')).hexdigest()
+        with self._lock:
+            if key not in self._renders:
+                output = os.path.join(self.cache_dir, f"{key}.png")
+                if os.path.exists(output):
+                    self._renders[key] = Future()
+                    self._renders[key].set_result(output)
+                else:
+                    if self._pool is None:
+                        self._pool = ThreadPoolExecutor(self.max_workers)
+                    self._renders[key] = self._pool.submit(render_diagram, command, source, output)
+            return self._renders[key]
+
+def render_diagram(command, source, output):
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    # Unique scratch names, since the same diagram may be rendered by several builds at once
+    scratch = f"{output}.{os.getpid()}.{threading.get_ident()}"
+    source_path, image_path = f"{scratch}.src", f"{scratch}.png"
+    try:
+        with open(source_path, 'w', encoding='utf-8') as f:
+            f.write(source)
+        args = [arg.replace('{source}', source_path).replace('{output}', image_path) for arg in command]
+        subprocess.run(args, check=True, capture_output=True, timeout=DIAGRAM_TIMEOUT)
+        os.replace(image_path, output)
+        return output
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"Diagram rendering failed, showing its source instead: {e}")
+        return None
+    finally:
+        for path in (source_path, image_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+class HtmlRenderer:
+    """Renders blocks into a standalone HTML manual styled with the shared manual stylesheet"""
+
+    def __init__(self, output_file, base_dir, subtitle):
+        self.output_file = output_file
+        self.base_dir = base_dir
+        self._html_dir = os.path.dirname(os.path.abspath(output_file))
+        self._list_tag = None
+        self._heading_ids = {}
+
+        os.makedirs(self._html_dir, exist_ok=True)
+        self._out = open(output_file, 'w', encoding='utf-8')
+        title = html.escape(f"COSMOS PM Admin Panel - {subtitle}")
+        self._out.write(
+            '<!DOCTYPE html>\n<html lang="en">\n<head>\n'
+            '    <meta charset="UTF-8">\n'
+            '    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+            f'    <title>{title}</title>\n'
+            f'    <style>\n{MANUAL_STYLESHEET}{HTML_EXTRA_STYLES}    </style>\n'
+            '</head>\n<body>\n\n'
+            '<div class="cover-page">\n'
+            '    <h1 class="cover-title">COSMOS PM Admin Panel</h1>\n'
+            f'    <h2 class="cover-subtitle">{html.escape(subtitle)}</h2>\n'
+            '</div>\n\n<div class="container">\n'
+        )
+
+    def render(self, block):
+        # Consecutive list items share one <ul>/<ol>
+        list_tag = None
+        if isinstance(block, ListItem):
+            list_tag = 'ol' if block.style == 'List Number' else 'ul'
+        if self._list_tag != list_tag:
+            if self._list_tag:
+                self._out.write(f"</{self._list_tag}>\n")
+            if list_tag:
+                self._out.write(f"<{list_tag}>\n")
+            self._list_tag = list_tag
+
+        renderer = BLOCK_RENDERERS.get(type(block))
+        if not renderer:
+            return
+        html_text = renderer.html(self, block)
+        if isinstance(html_text, str):
+            self._out.write(html_text)
+        else:
+            # Generators are written as they are produced, e.g. data tables of any size
+            self._out.writelines(html_text)
+
+    def _heading_id(self, text):
+        # GitHub-style anchors so the guide's [Section](#section) links keep working
+        slug = heading_slug(text)
+        count = self._heading_ids.get(slug, 0)
+        self._heading_ids[slug] = count + 1
+        return f"{slug}-{count}" if count else slug
+
+    def close(self):
+        if self._list_tag:
+            self._out.write(f"</{self._list_tag}>\n")
+        self._out.write('\n</div>\n\n</body>\n</html>\n')
+        self._out.close()
+        print(f"HTML manual saved to {self.output_file}")
+
+def html_heading(renderer, block):
+    tag, css_class = HTML_HEADINGS.get(block.level, HTML_HEADINGS[4])
+    return f'<{tag} class="{css_class}" id="{renderer._heading_id(block.text)}">{html.escape(block.text)}</{tag}>\n'
+
+def html_picture(renderer, block):
+    src = os.path.relpath(picture_path(block, renderer.base_dir), renderer._html_dir).replace(os.sep, '/')
+    alt = html.escape(block.alt)
+    return (f'<figure>\n    <img src="{html.escape(src)}" alt="{alt}" style="max-width: 100%;">\n'
+            f'    <figcaption>{alt}</figcaption>\n</figure>\n')
+
+def html_table(renderer, block):
+    return table_html(table_rows(block.lines))
+
+def html_data_table(renderer, block):
+    # Written as it is read, like the DOCX table, however many rows the file has
+    table_open = False
+    try:
+        for chunk in table_html(data_rows(block.path)):
+            table_open = True
+            yield chunk
+    except FileNotFoundError:
+        yield f"<p>[Table: {html.escape(os.path.basename(block.path))} - File not found]</p>\n"
+    except (ValueError, csv.Error) as e:
+        # A bad row can turn up after the table has started; close it so the page stays well-formed
+        if table_open:
+            yield '</tbody>\n</table>\n'
+        yield f"<p>[Table: {html.escape(os.path.basename(block.path))} - Error reading table]</p>\n"
+        print(f"Error reading table {block.path}: {e}")
+
+def html_alert(renderer, block):
+    css_class = HTML_ALERT_CLASSES.get(block.alert_type, 'info-box')
+    return (f'<div class="{css_class}">\n    <div class="info-box-title">{html.escape(block.alert_type)}</div>\n'
+            f'    <p>{inline_html(block.text.strip())}</p>\n</div>\n')
+
+def html_quote(renderer, block):
+    return f"<blockquote><p>{inline_html(block.text)}</p></blockquote>\n"
+
+def html_list_item(renderer, block):
+    return f"    <li>{inline_html(block.text)}</li>\n"
+
+def html_rule(renderer, block):
+    return '<hr>\n'
+
+def html_paragraph(renderer, block):
+    return f"<p>{inline_html(block.text.strip())}</p>\n"
+
+def html_code_block(renderer, block):
+    diagram = DIAGRAM_CACHE.get(block.language, block.text)
+    if diagram:
+        # Inlined so the HTML manual does not depend on the build cache
+        with open(diagram, 'rb') as f:
+            data = base64.b64encode(f.read()).decode('ascii')
+        return (f'<figure>\n    <img src="data:image/png;base64,{data}" alt="{html.escape(block.language)} diagram" '
+                'style="max-width: 100%;">\n</figure>\n')
+    language = f' class="language-{html.escape(block.language)}"' if block.language else ''
+    spans = HIGHLIGHT_CACHE.spans(block.text, block.language)
+    code = ''.join(code_span_html(*span) for span in spans) if spans else html.escape(block.text)
+    return f'<pre class="code-block"><code{language}>{code}</code></pre>\n'
+
+# Renderers by block type: docx(doc, block, base_dir) appends to a DOCX, html(renderer, block)
+# returns the block's HTML as a string or an iterable of strings
+BlockRenderer = namedtuple('BlockRenderer', ['docx', 'html'])
+CUSTOM_BLOCKS = []
+BLOCK_RENDERERS = {
+    Heading: BlockRenderer(docx_heading, html_heading),
+    Picture: BlockRenderer(docx_picture, html_picture),
+    Table: BlockRenderer(docx_table, html_table),
+    DataTable: BlockRenderer(docx_data_table, html_data_table),
+    Alert: BlockRenderer(docx_alert, html_alert),
+    Quote: BlockRenderer(docx_quote, html_quote),
+    ListItem: BlockRenderer(docx_list_item, html_list_item),
+    Rule: BlockRenderer(docx_rule, html_rule),
+    Paragraph: BlockRenderer(docx_paragraph, html_paragraph),
+    CodeBlock: BlockRenderer(docx_code_block, html_code_block),
+}
+
+def register_block(block_type, docx, html, lexer=None, tokens=''):
+    """
+    Plug a custom block type into the parser and both renderers. block_type is a namedtuple;
+    lexer(line, stripped, reader) is tried for lines whose first non-blank character is in
+    tokens and returns a block, or None to leave the line to the existing lexer (or Paragraph).
+    """
+    BLOCK_TYPES[block_type.__name__] = block_type
+    BLOCK_RENDERERS[block_type] = BlockRenderer(docx, html)
+    CUSTOM_BLOCKS.append(block_type.__name__)
+    if lexer:
+        for token in tokens:
+            LINE_LEXERS[token] = chain_lexers(lexer, LINE_LEXERS.get(token))
+
+def parser_version():
+    # Custom block types change what is parsed and rendered, so they are part of the cache keys
+    return '+'.join([str(PARSER_VERSION)] + CUSTOM_BLOCKS)
+
+def chain_lexers(lexer, fallback):
+    if fallback is None:
+        return lexer
+    def chained(line, stripped, reader):
+        block = lexer(line, stripped, reader)
+        return fallback(line, stripped, reader) if block is None else block
+    return chained
+
+def table_html(rows):
+    rows = iter(rows)
+    header = next(rows, None)
+    if not header:
+        return
+    yield '<table>\n<thead><tr>' + ''.join(f"<th>{html.escape(cell)}</th>" for cell in header) + '</tr></thead>\n<tbody>\n'
+    for cells in rows:
+        yield '<tr>' + ''.join(f"<td>{inline_html(cell)}</td>" for cell in cells[:len(header)]) + '</tr>\n'
+    yield '</tbody>\n</table>\n'
+
+def heading_slug(text):
+    return re.sub(r'[^\w\- ]', '', text.lower()).strip().replace(' ', '-')
+
+def inline_html(text):
+    # Escape, then turn markdown links into anchors
+    return LINK_PATTERN.sub(r'<a href="\2">\1</a>', html.escape(text))
+
+def code_span_html(text, color, bold, italic):
+    css = ''.join([f"color: #{color};" if color else '',
+                   'font-weight: bold;' if bold else '',
+                   'font-style: italic;' if italic else ''])
+    return f'<span style="{css}">{html.escape(text)}</span>' if css else html.escape(text)
+
+# Rules for blocks the manager manual has no styles for
+HTML_EXTRA_STYLES = '''\
+        pre.code-block {
+            background: #f5f5f5;
+            border: 1px solid var(--border-color);
+            border-radius: 6px;
+            padding: 12px 16px;
+            margin: 15px 0;
+            overflow-x: auto;
+        }
+
+        pre.code-block code {
+            font-family: Consolas, 'Courier New', monospace;
+            font-size: 13px;
+            line-height: 1.45;
+        }
+'''
+
+# Heading levels map onto the manual stylesheet's section classes
+HTML_HEADINGS = {
+    1: ('h2', 'section-title'),
+    2: ('h2', 'section-title'),
+    3: ('h3', 'subsection-title'),
+    4: ('h4', 'subsubsection-title'),
+}
+HTML_ALERT_CLASSES = {
+    'TIP': 'info-box tip',
+    'WARNING': 'info-box warning',
+    'IMPORTANT': 'info-box important',
+    'CAUTION': 'info-box important',
+}
+# Alert cell shading in the DOCX manual; other alert types get the blue info fill
+ALERT_FILLS = {
+    'IMPORTANT': 'FFEBEE',
+    'CAUTION': 'FFEBEE',
+    'WARNING': 'FFF3E0',
+    'TIP': 'E8F5E9',
+}
+
+def iter_sections(f, max_level=None):
+    """
+    Split markdown into sections that each start at a heading, yielding lists of lines.
+    With max_level, only headings at that level or above (fewer #s) start a new section.
+    """
+    reader = LineReader(f)
+    skip_frontmatter(reader)
+
+    section = []
+    fence = None
+    for line in reader:
+        if fence is None:
+            # Outside code fences no block spans a heading line, so sections can be lexed independently
+            if line.startswith('#') and section and (max_level is None or len(line.split()[0]) <= max_level):
+                yield section
+                section = []
+            fence_match = FENCE_PATTERN.match(line.lstrip())
+            if fence_match:
+                fence = fence_match.group(1)
+        elif closes_fence(line, fence):
+            fence = None
+        section.append(line)
+    if section:
+        yield section
+
+def build_incremental(doc, f, base_dir=None, writer=None, source_file=None):
+    """Render changed sections and splice cached OOXML fragments in for the rest"""
+    sectPr = doc.element.body.sectPr
+    rendered = reused = 0
+    for lines in iter_sections(f):
+        key = SECTION_CACHE.section_key(lines, base_dir, source_file)
+        entry = SECTION_CACHE.load(key)
+        if entry is not None:
+            SECTION_CACHE.restore(doc, entry)
+            reused += 1
+        else:
+            last = sectPr.getprevious()
+            for block in expand_includes(iter_blocks(lines, frontmatter=False), source_file):
+                render_block(doc, block, base_dir)
+
+            SECTION_CACHE.store(key, doc, elements_after(doc.element.body, last))
+            rendered += 1
+
+        if writer:
+            writer.flush()
+
+    print(f"Sections rendered: {rendered}, reused from cache: {reused}")
+
+def elements_after(body, last):
+    """The body elements added after last (None for the start of the body), up to the sectPr"""
+    elements = []
+    sectPr = body.sectPr
+    element = last.getnext() if last is not None else body[0]
+    while element is not sectPr:
+        elements.append(element)
+        element = element.getnext()
+    return elements
+
+class SectionCache:
+    """
+    Rendered OOXML fragments of markdown sections, keyed by a hash of the section source.
+    Embedded images are kept in a content-addressed media folder next to the fragments.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = os.path.join(cache_dir, 'sections')
+        self.media_dir = os.path.join(self.cache_dir, 'media')
+
+    def section_key(self, lines, base_dir=None, source_file=None):
+        digest = hashlib.sha256(f"v{SECTION_CACHE_VERSION}:{parser_version()}:{highlight_style()}:{DIAGRAM_CACHE.renderers()}".encode())
+        includes = []
+        for line in lines:
+            digest.update(line.encode('utf-8') + b'\n')
+            directive_match = DIRECTIVE_PATTERN.match(line.strip())
+            if directive_match:
+                block = DIRECTIVE_BLOCKS[directive_match.group(1)](directive_match.group(2))
+                if isinstance(block, Include):
+                    includes.append(block)
+                else:
+                    # Regenerated table data invalidates the section like a replaced screenshot
+                    update_stamp(digest, directive_path(block, source_file))
+            # A replaced screenshot invalidates the section even if the markdown is unchanged
+            img_match = IMAGE_PATTERN.match(line)
+            if img_match:
+                update_stamp(digest, resolve_image_path(img_match.group(2), base_dir))
+        # An edit to any included fragment, however deeply nested, invalidates the section,
+        # and so does a change to a screenshot or table file one of them uses
+        for path in included_files(includes, source_file):
+            try:
+                digest.update(file_digest(path).encode())
+                fragment = FRAGMENT_CACHE.blocks(path)
+            except OSError:
+                digest.update(b'missing')
+                continue
+            for block in fragment:
+                if isinstance(block, Picture):
+                    update_stamp(digest, fragment_image_path(block.path, os.path.dirname(path)))
+                elif isinstance(block, DataTable):
+                    update_stamp(digest, directive_path(block, path))
+        return digest.hexdigest()
+
+    def load(self, key):
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key, doc, elements):
+        entry = self.fragment(doc, elements)
+        write_atomic(os.path.join(self.cache_dir, f"{key}.json"), json.dumps(entry).encode('utf-8'))
+
+    def fragment(self, doc, elements):
+        """Serialize body elements for restore(), moving their images into the media folder"""
+        images = {}
+        for element in elements:
+            for blip in element.iter(qn('a:blip')):
+                rId = blip.get(qn('r:embed'))
+                blob = doc.part.related_parts[rId].blob
+                images[rId] = self._store_media(blob)
+
+        return {
+            'elements': [etree.tostring(element, encoding='unicode') for element in elements],
+            'images': images,
+        }
+
+    def restore(self, doc, entry):
+        rIds = {}
+        for old_rId, media_key in entry['images'].items():
+            with open(os.path.join(self.media_dir, media_key), 'rb') as f:
+                rIds[old_rId], _ = doc.part.get_or_add_image(io.BytesIO(f.read()))
+
+        for xml in entry['elements']:
+            element = parse_xml(xml)
+            doc.append(element)
+            for blip in element.iter(qn('a:blip')):
+                blip.set(qn('r:embed'), rIds[blip.get(qn('r:embed'))])
+            # Drawing ids must stay unique within the new document
+            for doc_pr in element.iter(qn('wp:docPr')):
+                shape_id = doc.next_shape_id()
+                doc_pr.set('id', str(shape_id))
+                doc_pr.set('name', f"Picture {shape_id}")
+
+    def _store_media(self, blob):
+        media_key = hashlib.sha256(blob).hexdigest()
+        media_path = os.path.join(self.media_dir, media_key)
+        if not os.path.exists(media_path):
+            write_atomic(media_path, blob)
+        return media_key
+
+def update_stamp(digest, path):
+    # Fold a file's mtime and size into a cache key, or mark it missing
+    try:
+        stat = os.stat(path)
+        digest.update(f"{stat.st_mtime_ns}:{stat.st_size}".encode())
+    except OSError:
+        digest.update(b'missing')
+
+def write_atomic(path, data):
+    # Write then rename so concurrent builds never see a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+SECTION_CACHE = SectionCache(CACHE_DIR)
+HIGHLIGHT_CACHE = HighlightCache(CACHE_DIR)
+DIAGRAM_CACHE = DiagramCache(CACHE_DIR)
+FRAGMENT_CACHE = FragmentCache()
+
 if __name__ == '__main__':
-    create_manual()
+    parser = argparse.ArgumentParser(description='Convert the user workflow guide to DOCX')
+    parser.add_argument('--incremental', action='store_true',
+                        help='re-render only sections that changed since the last build')
+    parser.add_argument('--html', metavar='PATH', nargs='?', const=os.path.splitext(OUTPUT_FILE)[0] + '.html',
+                        help='also render an HTML manual from the same parse (default: next to the DOCX)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='stream body XML into the output file to keep memory bounded on huge guides')
+    parser.add_argument('--batch', metavar='DIR_OR_GLOB',
+                        help='convert every markdown file in a directory or matching a glob')
+    parser.add_argument('--watch', metavar='PATH', nargs='?', const=MARKDOWN_FILE,
+                        help='rebuild on every change to a markdown file or docs directory '
+                             '(default: the user workflow guide)')
+    parser.add_argument('--highlight-style', metavar='NAME', default=HIGHLIGHT_STYLE,
+                        help=f"Pygments style for code listings, or 'none' for plain (default: {HIGHLIGHT_STYLE})")
+    parser.add_argument('--chapters', metavar='DIR', nargs='?', const=os.path.splitext(OUTPUT_FILE)[0] + '_chapters',
+                        help='render each #/## chapter to its own DOCX in DIR, in parallel '
+                             '(default: next to the DOCX)')
+    parser.add_argument('--no-combined', action='store_true',
+                        help='with --chapters, skip the combined manual')
+    parser.add_argument('--roles', metavar='ROLE', nargs='*',
+                        help=f"render a separate manual per role, in parallel (default: {', '.join(ROLE_PATTERNS)})")
+    parser.add_argument('--output-dir', help='where batch/watch/role outputs go (default: next to each source)')
+    parser.add_argument('--workers', type=int, help='size of the batch/chapter worker pool (default: CPU count)')
+    args = parser.parse_args()
+    use_highlight_style(args.highlight_style)
+
+    if args.watch:
+        watch(args.watch, args.output_dir)
+        raise SystemExit(0)
+    if args.roles is not None:
+        unknown = [role for role in args.roles if role not in ROLE_PATTERNS]
+        if unknown:
+            parser.error(f"unknown role(s): {', '.join(unknown)}")
+        failures = create_role_manuals(output_dir=args.output_dir, roles=args.roles, workers=args.workers)
+        raise SystemExit(1 if failures else 0)
+    if args.batch:
+        failures = convert_batch(args.batch, args.output_dir, args.workers)
+        raise SystemExit(1 if failures else 0)
+    failures = create_manual(incremental=args.incremental, streaming=args.streaming, html_file=args.html,
+                             chapters_dir=args.chapters, combined=not args.no_combined, workers=args.workers)
+    if args.chapters:
+        raise SystemExit(1 if failures else 0)
@@ -0,0 +1,48 @@
+"""
+Incremental reader for large top-level JSON arrays, shared by the manual generator's data
+tables and the test plan's result ingestion
+
+json.load needs the whole document in memory. iter_json_array reads the file in chunks and
+decodes one array item at a time with JSONDecoder.raw_decode, so only the current item and
+one chunk are ever held, whatever the size of the file.
+"""
+import json
+import re
+
+JSON_SEPARATORS = re.compile(r'[\s,]*')
+JSON_DELIMITERS = frozenset(',] \t\n\r')  # What may follow a complete array item
+
+def iter_json_array(f, chunk_size=1 << 16):
+    """Yield the items of a top-level JSON array one by one, reading the file in chunks"""
+    decoder = json.JSONDecoder()
+    # Leading whitespace may run over more than one chunk
+    buffer = ''
+    while not buffer:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        buffer = chunk.lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('expected a JSON array')
+    pos, eof = 1, False
+    while True:
+        pos = JSON_SEPARATORS.match(buffer, pos).end()
+        if pos < len(buffer):
+            if buffer[pos] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # A value may continue in the next chunk ("-2" of "-2.5") unless a delimiter follows it
+                if eof or (end < len(buffer) and buffer[end] in JSON_DELIMITERS):
+                    yield item
+                    pos = end
+                    continue
+        elif eof:
+            raise ValueError('unterminated JSON array')
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
@@ -0,0 +1,185 @@
+"""
+Test run results indexed by Test ID, for merging outcomes into the test case plan
+
+ResultIndex reads JUnit XML reports with lxml's iterparse and JSON / JSON Lines result files
+item by item, dropping each parsed test case as soon as it is indexed. Only the latest result
+per Test ID is kept, in a dict, so thousands of run files merge in one pass with memory that
+grows with the number of distinct tests rather than the number of results.
+"""
+import glob
+import json
+import os
+import re
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from lxml import etree
+
+from json_stream import iter_json_array
+
+RESULT_EXTENSIONS = ('.xml', '.json', '.jsonl', '.ndjson')
+# Test IDs such as AUTH-001 in test names, also written auth_001 as in test_auth_001_valid_login
+TEST_ID_PATTERN = re.compile(r'(?<![A-Za-z0-9])([A-Za-z]{2,})[-_](\d{3,})(?!\d)')
+JUNIT_ID_PROPERTIES = ('test_id', 'Test ID')  # <property> names that carry the ID explicitly
+JUNIT_OUTCOMES = {'failure': 'Failed', 'error': 'Error', 'skipped': 'Skipped'}
+JSON_ID_KEYS = ('test_id', 'testId')
+# Searched in order for a Test ID when no ID key is present; a bare id is often a hash or counter
+JSON_NAME_KEYS = ('name', 'title', 'id')
+JSON_STATUS_KEYS = ('status', 'outcome', 'result')
+JSON_TIME_KEYS = ('timestamp', 'last_run', 'finished_at')
+EPOCH_MILLISECONDS_ABOVE = 1e11  # Larger Unix times are in milliseconds: 1e11 seconds is over 3000 years away
+STATUS_NAMES = {
+    'pass': 'Passed', 'passed': 'Passed', 'ok': 'Passed', 'success': 'Passed',
+    'fail': 'Failed', 'failed': 'Failed', 'failure': 'Failed',
+    'error': 'Error', 'errored': 'Error', 'broken': 'Error',
+    'skip': 'Skipped', 'skipped': 'Skipped', 'pending': 'Skipped', 'disabled': 'Skipped',
+}
+
+# last_run is a naive UTC datetime
+TestResult = namedtuple('TestResult', ['status', 'last_run', 'source'])
+
+class ResultIndex:
+    """Latest result per Test ID across any number of JUnit XML and JSON result files"""
+
+    def __init__(self):
+        self.results = {}
+        self.files = 0
+        self.unidentified = 0  # Results with no recognisable Test ID
+        self.unreadable = []  # Result files that failed to parse; results read before the error are kept
+        self.newest = None
+
+    def get(self, test_id):
+        return self.results.get(test_id)
+
+    def add(self, test_id, status, last_run, source):
+        if not test_id:
+            self.unidentified += 1
+            return
+        # Files are read in order, so of two runs at the same time the later file wins
+        current = self.results.get(test_id)
+        if current is None or last_run >= current.last_run:
+            self.results[test_id] = TestResult(status, last_run, source)
+        if self.newest is None or last_run > self.newest:
+            self.newest = last_run
+
+    def load(self, path):
+        """Index one result file, chosen by extension: .xml is JUnit, .json an array, .jsonl one result per line"""
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in RESULT_EXTENSIONS:
+            raise ValueError(f"unsupported result format: {extension}")
+        # Results without a timestamp of their own count as run when the file was written
+        file_time = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).replace(tzinfo=None)
+        if extension == '.xml':
+            self._load_junit(path, file_time)
+        else:
+            with open(path, 'r', encoding='utf-8-sig') as f:
+                items = iter_json_array(f) if extension == '.json' else (json.loads(line) for line in f if line.strip())
+                for item in items:
+                    self._add_json(item, file_time, path)
+        self.files += 1
+
+    def _load_junit(self, path, file_time):
+        suite_times = [file_time]
+        for event, element in etree.iterparse(path, events=('start', 'end'), tag=('testsuite', 'testcase')):
+            if element.tag == 'testsuite':
+                # Nested suites inherit the timestamp of the suite around them
+                if event == 'start':
+                    suite_times.append(parse_timestamp(element.get('timestamp')) or suite_times[-1])
+                else:
+                    suite_times.pop()
+                continue
+            if event == 'start':
+                continue
+
+            status = 'Passed'
+            for child in element:
+                if child.tag in JUNIT_OUTCOMES:
+                    status = JUNIT_OUTCOMES[child.tag]
+                    break
+            self.add(junit_test_id(element), status, suite_times[-1], path)
+
+            # Drop the finished test case and any siblings before it to keep the tree empty
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    def _add_json(self, item, file_time, path):
+        if not isinstance(item, dict):
+            self.unidentified += 1
+            return
+        test_id = first_value(item, JSON_ID_KEYS)
+        if test_id is not None:
+            test_id = normalize_test_id(str(test_id))
+        else:
+            test_id = next(filter(None, (find_test_id(item.get(key)) for key in JSON_NAME_KEYS)), None)
+        status = first_value(item, JSON_STATUS_KEYS)
+        last_run = parse_timestamp(first_value(item, JSON_TIME_KEYS)) or file_time
+        self.add(test_id, status_name(status), last_run, path)
+
+def load_results(paths):
+    """Build a ResultIndex from result files, directories of them and glob patterns, in sorted order"""
+    index = ResultIndex()
+    for path in paths:
+        if os.path.isdir(path):
+            files = [os.path.join(path, name) for name in os.listdir(path)
+                     if os.path.splitext(name)[1].lower() in RESULT_EXTENSIONS]
+        else:
+            files = glob.glob(path) or [path]
+        for result_file in sorted(files):
+            # One truncated or malformed file (e.g. from an interrupted run) must not sink the rest
+            try:
+                index.load(result_file)
+            except (OSError, ValueError, etree.XMLSyntaxError) as e:
+                index.unreadable.append(result_file)
+                print(f"Error reading results {result_file}: {e}")
+    return index
+
+def junit_test_id(testcase):
+    for prop in testcase.iterfind('properties/property'):
+        if prop.get('name') in JUNIT_ID_PROPERTIES and prop.get('value'):
+            return normalize_test_id(prop.get('value'))
+    return find_test_id(testcase.get('name')) or find_test_id(testcase.get('classname'))
+
+def find_test_id(text):
+    match = TEST_ID_PATTERN.search(text) if isinstance(text, str) else None
+    return f"{match.group(1).upper()}-{match.group(2)}" if match else None
+
+def normalize_test_id(text):
+    # Explicit IDs are matched to the catalog the same way as IDs found in names: auth_001 is AUTH-001
+    text = text.strip()
+    match = TEST_ID_PATTERN.fullmatch(text)
+    return f"{match.group(1).upper()}-{match.group(2)}" if match else text.upper()
+
+def first_value(item, keys):
+    for key in keys:
+        if item.get(key) is not None:
+            return item[key]
+    return None
+
+def status_name(status):
+    if status is None:
+        return 'Unknown'
+    if isinstance(status, bool):
+        return 'Passed' if status else 'Failed'
+    text = str(status).strip()
+    return STATUS_NAMES.get(text.lower(), text.title())
+
+def parse_timestamp(value):
+    # ISO 8601 from JUnit/JSON, or a Unix time in seconds or milliseconds; returned as naive UTC
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if abs(value) > EPOCH_MILLISECONDS_ABOVE:
+            value /= 1000
+        try:
+            return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+        except (ValueError, OverflowError, OSError):
+            # Out of range: the result counts as run when its file was written
+            return None
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        timestamp = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp